@@ -0,0 +1,140 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_BATCH_SIZE = getattr(settings, "ACTIVITY_LOG_BATCH_SIZE", 200)
+ACTIVITY_LOG_FLUSH_INTERVAL = getattr(settings, "ACTIVITY_LOG_FLUSH_INTERVAL", 2.0)
+ACTIVITY_LOG_MAX_QUEUE = getattr(settings, "ACTIVITY_LOG_MAX_QUEUE", 10000)
+
+
+# ==================================================
+# BUFFERED ACTIVITY LOG WRITER
+# ==================================================
+
+class ActivityLogWriter:
+    """
+    Queues ActivityLog rows in-process and writes them with bulk_create
+    from a background thread once `batch_size` rows are waiting or every
+    `flush_interval` seconds, and once more at interpreter exit.
+    When the queue holds `max_queue` rows new entries are dropped (and
+    counted) rather than blocking requests.
+    """
+
+    def __init__(self, batch_size=ACTIVITY_LOG_BATCH_SIZE, flush_interval=ACTIVITY_LOG_FLUSH_INTERVAL,
+                 max_queue=ACTIVITY_LOG_MAX_QUEUE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.flushed = 0
+        self.dropped = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def log(self, user, action):
+        # Stamped now, not at flush time
+        entry = ActivityLog(user_id=getattr(user, "id", user), action=action, timestamp=timezone.now())
+
+        with self._lock:
+            if len(self._buffer) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.batch_size
+
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """
+        Writes everything queued so far; returns the number of rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            try:
+                try:
+                    ActivityLog.objects.bulk_create(batch, batch_size=self.batch_size)
+                except IntegrityError:
+                    # Typically a user deleted before the flush; keep the entries
+                    self._write_each(batch)
+            except Exception:
+                logger.exception(f"[ActivityLog] Flush failed, dropped {len(batch)} entries")
+                with self._lock:
+                    self.dropped += len(batch)
+                return 0
+
+            with self._lock:
+                self.flushed += len(batch)
+            return len(batch)
+
+    def _write_each(self, batch):
+        for entry in batch:
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+            except IntegrityError:
+                entry.user_id = None
+                entry.save(force_insert=True)
+
+    def stats(self):
+        with self._lock:
+            return {"queued": len(self._buffer), "flushed": self.flushed, "dropped": self.dropped}
+
+    def _ensure_thread(self):
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                # This thread's own connection; never left open between flushes
+                connection.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_activity_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ActivityLogWriter()
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def log_activity(user, action, sync=False):
+    """
+    Records an activity entry for `user` (a User or a user id).
+    sync=True writes immediately, in the caller's transaction; use it for
+    entries that must commit or roll back with the surrounding change.
+    """
+    if sync or not settings.ACTIVITY_LOG_BUFFERED:
+        return ActivityLog.objects.create(user_id=getattr(user, "id", user), action=action)
+    get_activity_writer().log(user, action)
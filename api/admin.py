@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Profile, Order, Product
+from django.db import transaction
+from .models import Profile, Order, Product, WebhookEvent
+from .product_cache import invalidate_products
 
 
 # ============================
@@ -62,4 +64,56 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = (
         "title",
         "category",
-    )
\ No newline at end of file
+    )
+
+    # Maintained by checkout holds and sync_products; never edited by hand
+    exclude = (
+        "reserved",
+        "sync_hash",
+    )
+
+    def save_model(self, request, obj, form, change):
+        # Write only the edited columns, so a concurrent checkout's
+        # `reserved` update is not overwritten with the value read here
+        if change:
+            obj.save(update_fields=form.changed_data)
+        else:
+            obj.save()
+        transaction.on_commit(lambda: invalidate_products([obj.pk]))
+
+    def delete_model(self, request, obj):
+        product_id = obj.pk
+        obj.delete()
+        transaction.on_commit(lambda: invalidate_products([product_id]))
+
+    def delete_queryset(self, request, queryset):
+        # "Delete selected products" action
+        product_ids = list(queryset.values_list("id", flat=True))
+        queryset.delete()
+        transaction.on_commit(lambda: invalidate_products(product_ids))
+
+# ============================
+# Webhook Inbox Admin
+# ============================
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "id",
+        "event_type",
+        "event_id",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "received_at",
+    )
+
+    list_filter = (
+        "status",
+        "event_type",
+    )
+
+    search_fields = (
+        "event_id",
+    )
@@ -0,0 +1,229 @@
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import Product
+from .product_cache import catalog_generation, get_products
+
+
+# ============================
+# In-process Catalog Snapshot
+# ============================
+
+# How often (seconds) a worker checks the shared generation counter.
+CATALOG_CHECK_INTERVAL = getattr(settings, "CATALOG_CHECK_INTERVAL", 1.0)
+
+# Snapshots older than this are rebuilt even if the counter never moved
+# (e.g. an invalidation lost with an evicted or flushed cache key).
+CATALOG_MAX_AGE = getattr(settings, "CATALOG_MAX_AGE", 300)
+
+# Lightweight read-only view of a product row; exposes the same attributes
+# as Product for the fields the hot paths use.
+CatalogEntry = namedtuple(
+    "CatalogEntry",
+    ["id", "title", "price_inr", "stock", "is_active", "category"]
+)
+
+
+class CatalogSnapshot:
+    """
+    Compact, array-backed copy of the Product table.
+
+    Numeric columns live in typed arrays, titles in one string with an
+    offsets array, and categories are interned. Lookups by id are O(1):
+    a direct position array when ids are dense, a dict when sparse.
+    """
+
+    __slots__ = (
+        "generation", "built_at", "ids", "prices", "stocks", "active",
+        "categories", "category_idx", "titles", "title_offsets",
+        "_positions", "_dense",
+    )
+
+    def __init__(self, generation=None):
+        self.generation = generation
+        self.built_at = time.monotonic()
+        self.ids = array("q")
+        self.prices = array("q")
+        self.stocks = array("q")
+        self.active = array("b")
+        self.categories = []
+        self.category_idx = array("H")
+        self.titles = ""
+        self.title_offsets = array("L", [0])
+        self._positions = {}
+        self._dense = False
+
+    @classmethod
+    def from_rows(cls, rows, generation=None):
+        """
+        Builds a snapshot from (id, title, price_inr, stock, is_active, category)
+        tuples ordered by id.
+        """
+        snapshot = cls(generation)
+        category_lookup = {}
+        title_parts = []
+        offset = 0
+
+        for pid, title, price_inr, stock, is_active, category in rows:
+            snapshot.ids.append(pid)
+            snapshot.prices.append(price_inr)
+            snapshot.stocks.append(stock)
+            snapshot.active.append(1 if is_active else 0)
+
+            if category not in category_lookup:
+                category_lookup[category] = len(snapshot.categories)
+                snapshot.categories.append(category)
+            snapshot.category_idx.append(category_lookup[category])
+
+            title_parts.append(title)
+            offset += len(title)
+            snapshot.title_offsets.append(offset)
+
+        snapshot.titles = "".join(title_parts)
+        snapshot._build_index()
+        return snapshot
+
+    def _build_index(self):
+        count = len(self.ids)
+        max_id = self.ids[-1] if count else 0
+
+        if count and self.ids[0] >= 0 and max_id < 2 * count + 64:
+            positions = array("l", [-1]) * (max_id + 1)
+            for pos, pid in enumerate(self.ids):
+                positions[pid] = pos
+            self._dense = True
+        else:
+            positions = {pid: pos for pos, pid in enumerate(self.ids)}
+            self._dense = False
+
+        self._positions = positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, product_id):
+        if self._dense:
+            if 0 <= product_id < len(self._positions):
+                pos = self._positions[product_id]
+                return pos if pos >= 0 else None
+            return None
+        return self._positions.get(product_id)
+
+    def title(self, pos):
+        return self.titles[self.title_offsets[pos]:self.title_offsets[pos + 1]]
+
+    def entry(self, pos):
+        return CatalogEntry(
+            self.ids[pos],
+            self.title(pos),
+            self.prices[pos],
+            self.stocks[pos],
+            bool(self.active[pos]),
+            self.categories[self.category_idx[pos]],
+        )
+
+    def get(self, product_id):
+        pos = self.position(product_id)
+        return self.entry(pos) if pos is not None else None
+
+    def __iter__(self):
+        for pos in range(len(self.ids)):
+            yield self.entry(pos)
+
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _load_snapshot(generation):
+    rows = Product.objects.order_by("id").values_list(
+        "id", "title", "price_inr", "stock", "is_active", "category"
+    )
+    return CatalogSnapshot.from_rows(rows.iterator(chunk_size=2000), generation)
+
+
+def snapshot_enabled():
+    """
+    The generation counter only reaches other workers through a shared
+    cache (settings.CATALOG_SNAPSHOT, on by default with Redis).
+    """
+    return settings.CATALOG_SNAPSHOT
+
+
+def _fresh(snapshot, generation, now):
+    return (
+        snapshot is not None
+        and snapshot.generation == generation
+        and now - snapshot.built_at < CATALOG_MAX_AGE
+    )
+
+
+def get_catalog():
+    """
+    Returns this worker's snapshot, rebuilding it when the shared catalog
+    generation has moved or it is older than CATALOG_MAX_AGE. The
+    generation is checked at most once per CATALOG_CHECK_INTERVAL, so
+    steady-state reads cost no I/O at all.
+    With the snapshot disabled, every call reads the table afresh.
+    """
+    global _snapshot, _checked_at
+
+    if not snapshot_enabled():
+        return _load_snapshot(None)
+
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < CATALOG_CHECK_INTERVAL:
+        return snapshot
+
+    generation = catalog_generation()
+    if _fresh(snapshot, generation, now):
+        _checked_at = now
+        return snapshot
+
+    with _lock:
+        if not _fresh(_snapshot, generation, now):
+            _snapshot = _load_snapshot(generation)
+        _checked_at = now
+        return _snapshot
+
+
+def reset_catalog():
+    """
+    Drops this worker's snapshot (used by tests and after bulk imports).
+    """
+    global _snapshot, _checked_at
+    with _lock:
+        _snapshot = None
+        _checked_at = 0.0
+
+
+def lookup_products(product_ids):
+    """
+    Returns {id: CatalogEntry} from the snapshot. Ids created after the
+    snapshot was built, and every id while the snapshot is disabled, come
+    from get_products instead.
+    """
+    if not snapshot_enabled():
+        return get_products(product_ids)
+
+    catalog = get_catalog()
+    found = {}
+    unknown = []
+
+    for pid in product_ids:
+        entry = catalog.get(pid)
+        if entry is None:
+            unknown.append(pid)
+        else:
+            found[pid] = entry
+
+    if unknown:
+        found.update(get_products(unknown))
+
+    return found
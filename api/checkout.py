@@ -0,0 +1,169 @@
+import logging
+
+from .activity import log_activity
+from .models import CartSnapshot
+from .reservations import attach_reservations, release_reservations, reserve_stock, session_expires_at
+from .utils import validate_cart
+
+logger = logging.getLogger(__name__)
+
+SUCCESS_URL = "https://aikart-shop.onrender.com/success"
+CANCEL_URL = "https://aikart-shop.onrender.com/cart"
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# ==================================================
+# CHECKOUT STEPS (shared by the sync and async views)
+# ==================================================
+
+def normalize_cart(items):
+    """
+    Accepts {product_id, quantity} or {id, qty} lines and aggregates
+    duplicates into [{product_id, quantity}].
+    """
+    # FIX 1: NORMALIZE CART INPUT
+    items = [
+        {
+            "product_id": item.get("product_id") or item.get("id"),
+            "quantity": item.get("quantity") or item.get("qty")
+        }
+        for item in items
+    ]
+
+    # FIX 2: AGGREGATE DUPLICATES
+    aggregated = {}
+    for item in items:
+        pid = item["product_id"]
+        qty = item["quantity"]
+
+        if pid in aggregated:
+            aggregated[pid] += qty
+        else:
+            aggregated[pid] = qty
+
+    return [
+        {"product_id": pid, "quantity": qty}
+        for pid, qty in aggregated.items()
+    ]
+
+
+def prepare_checkout(items):
+    """
+    Validates the cart and reserves stock. Returns a dict with the Stripe
+    line items plus what finalize_checkout() needs; raises CheckoutError.
+    Any holds are released again if the cart is rejected.
+    """
+    if not items:
+        raise CheckoutError("Cart is empty")
+
+    # Validation
+    validated = validate_cart(normalize_cart(items), lock=False)
+    valid_items = validated["valid_items"]
+    removed_items = validated["removed_items"]
+
+    if not valid_items:
+        raise CheckoutError("No available products in your cart")
+
+    # Reserve stock for the lifetime of the Stripe session
+    requested = {}
+    for v_item in valid_items:
+        pid = v_item["product"].id
+        requested[pid] = requested.get(pid, 0) + v_item["quantity"]
+
+    held, reservations = reserve_stock(requested)
+
+    total = 0
+    line_items = []
+    reserved_items = []
+
+    for v_item in valid_items:
+        product = v_item["product"]
+        qty = min(v_item["quantity"], held.get(product.id, 0))
+        price_inr = v_item["price_inr"]
+
+        if qty < v_item["quantity"]:
+            removed_items.append({
+                "product_id": product.id,
+                "reason": "quantity_adjusted" if qty else "out_of_stock",
+                "title": product.title,
+                "original_qty": v_item["quantity"],
+                "new_qty": qty
+            })
+        if not qty:
+            continue
+        held[product.id] -= qty
+
+        total += price_inr * qty
+        # The charged unit price travels with the snapshot to the webhook
+        reserved_items.append({"product_id": product.id, "quantity": qty, "price_inr": price_inr})
+        line_items.append({
+            "price_data": {
+                "currency": "inr",
+                "product_data": {
+                    "name": product.title
+                },
+                "unit_amount": price_inr * 100, # In Cents
+            },
+            "quantity": qty,
+        })
+
+    if removed_items:
+        logger.warning(f"Items removed/adjusted during checkout: {removed_items}")
+
+    if not line_items:
+        raise CheckoutError("No available products in your cart")
+
+    if total < 50:
+        release_reservations(reservations)
+        raise CheckoutError("Cart total must be at least ₹50")
+
+    return {
+        "line_items": line_items,
+        "reserved_items": reserved_items,
+        "removed_items": removed_items,
+        "reservations": reservations,
+    }
+
+
+def session_params(user, line_items):
+    return {
+        "mode": "payment",
+        "line_items": line_items,
+        "success_url": SUCCESS_URL,
+        "cancel_url": CANCEL_URL,
+        "expires_at": session_expires_at(),
+        "metadata": {
+            "user_id": str(user.id)
+        },
+    }
+
+
+def abort_checkout(prepared):
+    release_reservations(prepared["reservations"])
+
+
+def finalize_checkout(user, session, prepared):
+    """
+    Persists the snapshot for the webhook and builds the response body.
+    """
+    # Save Snapshot (only what was reserved and charged, for webhook safety)
+    snapshot = CartSnapshot.objects.create(
+        stripe_session_id=session.id,
+        items=prepared["reserved_items"]
+    )
+    attach_reservations(prepared["reservations"], snapshot)
+
+    log_activity(user, "Created checkout session")
+    logger.info(f"Checkout Session Created: {session.id} for user_id={user.id}")
+
+    response_data = {"url": session.url}
+    if prepared["removed_items"]:
+        response_data["message"] = "Some items were updated or removed before checkout"
+
+    return response_data
@@ -0,0 +1,96 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .models import Address, Order, Profile
+
+
+# ==================================================
+# CONDITIONAL GET (ETag / Last-Modified)
+# ==================================================
+
+class Validators:
+    """
+    Cheap validators for a GET response, computed from a narrow indexed
+    query instead of the full payload.
+    """
+
+    def __init__(self, *parts, last_modified=None):
+        digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+        self.etag = quote_etag(digest)
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    def not_modified(self, request):
+        """
+        Returns a 304 response when the client's If-None-Match /
+        If-Modified-Since still match, else None.
+        """
+        return get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+
+    def apply(self, response, cache_control="private, no-cache"):
+        response["ETag"] = self.etag
+        if self.last_modified:
+            response["Last-Modified"] = http_date(self.last_modified)
+        # Private data: by default browsers may keep it but must revalidate
+        response["Cache-Control"] = cache_control
+        return response
+
+
+# ==================================================
+# VALIDATORS PER RESOURCE
+# Each pairs a queryset (usable with the sync or async ORM) with a
+# builder, so both view flavours share the same ETag scheme.
+# ==================================================
+
+# Orders are immutable once written, so count + newest row identify the
+# list; all three come from the (user, -created_at, -id) index.
+ORDERS_STATE = {"count": Count("id"), "latest": Max("created_at"), "top": Max("id")}
+
+
+def orders_state_query(user):
+    return Order.objects.filter(user=user)
+
+
+def orders_validators(user, params, state):
+    # Pagination params are part of the representation
+    page = sorted((k, params.get(k)) for k in ("limit", "offset", "after") if k in params)
+    return Validators(
+        "orders", user.id, state["count"], state["latest"], state["top"], page,
+        last_modified=state["latest"],
+    )
+
+
+def order_version_query(user, order_id):
+    return Order.objects.filter(id=order_id, user=user).values_list(
+        "created_at", "paid_at", "payment_status"
+    )
+
+
+def order_validators(order_id, version):
+    created_at, paid_at, payment_status = version
+    return Validators(
+        "order", order_id, created_at, paid_at, payment_status,
+        last_modified=paid_at or created_at,
+    )
+
+
+def profile_version_query(user):
+    return Profile.objects.filter(user=user).values_list("updated_at", flat=True)
+
+
+def profile_validators(user, updated_at):
+    # username/email come from the already-authenticated user row
+    return Validators("me", user.id, user.username, user.email, updated_at)
+
+
+def address_version_query(user):
+    return Address.objects.filter(user=user).values_list("id", "updated_at")
+
+
+def address_validators(user, version):
+    address_id, updated_at = version or (None, None)
+    return Validators("address", user.id, address_id, updated_at, last_modified=updated_at)
@@ -0,0 +1,117 @@
+import csv
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ActivityLog, Order
+
+# ==================================================
+# STREAMING EXPORTS (CSV / NDJSON)
+# Rows are read with .iterator(), which uses a server-side cursor on
+# PostgreSQL, and written out in small batches, so memory stays flat no
+# matter how much history is exported.
+# ==================================================
+
+EXPORT_CHUNK_SIZE = 2000
+LINES_PER_WRITE = 500
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+PAYMENT_FIELDS = [
+    ("id", "id"),
+    ("user", "user__username"),
+    ("amount", "total"),
+    ("status", "payment_status"),
+    ("payment_method", "payment_method"),
+    ("paid_at", "paid_at"),
+    ("created_at", "created_at"),
+]
+
+LOG_FIELDS = [
+    ("id", "id"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("action", "action"),
+    ("timestamp", "timestamp"),
+]
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def export_lines(rows, names, fmt):
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+def batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= LINES_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def date_bounds(params):
+    """
+    Optional inclusive `from`/`to` dates (YYYY-MM-DD) as aware datetimes
+    [since, until). Raises ValueError on malformed dates.
+    """
+    tz = timezone.get_current_timezone()
+    since = until = None
+    if params.get("from"):
+        since = datetime.datetime.combine(
+            datetime.date.fromisoformat(params["from"]), datetime.time.min, tzinfo=tz
+        )
+    if params.get("to"):
+        until = datetime.datetime.combine(
+            datetime.date.fromisoformat(params["to"]) + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz
+        )
+    return since, until
+
+
+def stream_export(queryset, fields, fmt, filename):
+    names = [name for name, _ in fields]
+    rows = queryset.values_list(*[column for _, column in fields]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    response = StreamingHttpResponse(batched(export_lines(rows, names, fmt)), content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def payments_queryset(since=None, until=None):
+    # Primary-key order: no sort step, and a user deleted later just
+    # exports an empty username via the LEFT JOIN
+    payments = Order.objects.order_by("id")
+    if since:
+        payments = payments.filter(created_at__gte=since)
+    if until:
+        payments = payments.filter(created_at__lt=until)
+    return payments
+
+
+def logs_queryset(since=None, until=None):
+    logs = ActivityLog.objects.order_by("id")
+    if since:
+        logs = logs.filter(timestamp__gte=since)
+    if until:
+        logs = logs.filter(timestamp__lt=until)
+    return logs
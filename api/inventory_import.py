@@ -0,0 +1,223 @@
+import csv
+import logging
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .models import Product
+from .product_cache import invalidate_products
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_IMPORT_BATCH_SIZE = getattr(settings, "INVENTORY_IMPORT_BATCH_SIZE", 2000)
+
+# Every reject is counted, but only this many are listed in the report
+MAX_REPORTED_REJECTS = 1000
+
+
+# ==================================================
+# CSV INVENTORY IMPORT
+# The file is read one row at a time. Every `batch_size` rows are
+# validated together and written with one INSERT .. ON CONFLICT (id)
+# DO UPDATE in their own transaction, so memory stays flat and a bad row
+# only rejects itself. Only the columns present in the file are updated;
+# `reserved` is never touched. A file without title/price_inr can only
+# update existing products, with one bulk UPDATE per batch. A file that
+# stops parsing part way keeps everything before the bad line.
+# ==================================================
+
+def _int(value, field):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {field} value")
+
+
+def _title(value):
+    value = value.strip()
+    if not value:
+        raise ValueError("Title is required")
+    if len(value) > 255:
+        raise ValueError("Title is longer than 255 characters")
+    return value
+
+
+def _price(value):
+    value = _int(value, "price_inr")
+    if value <= 0:
+        raise ValueError("Price must be positive")
+    return value
+
+
+def _category(value):
+    value = value.strip()
+    if len(value) > 100:
+        raise ValueError("Category is longer than 100 characters")
+    return value
+
+
+def _stock(value):
+    value = _int(value, "stock")
+    if value < 0:
+        raise ValueError("Stock cannot be negative")
+    return value
+
+
+_BOOLEANS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+
+def _active(value):
+    try:
+        return _BOOLEANS[value.strip().lower()]
+    except KeyError:
+        raise ValueError("is_active must be true or false")
+
+
+INVENTORY_COLUMNS = {
+    "title": _title,
+    "price_inr": _price,
+    "category": _category,
+    "stock": _stock,
+    "is_active": _active,
+}
+
+# Without these a row can only update an existing product
+CREATE_COLUMNS = ("title", "price_inr")
+
+
+def read_header(reader):
+    """
+    Returns the normalised column names. Raises ValueError for a file
+    that cannot be imported at all.
+    """
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ValueError("CSV file is empty")
+
+    columns = [name.strip().lower() for name in header]
+    unknown = set(columns) - set(INVENTORY_COLUMNS) - {"id"}
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    if len(set(columns)) != len(columns):
+        raise ValueError("Duplicate columns")
+    if "id" not in columns:
+        raise ValueError("CSV must have an id column")
+    if len(columns) == 1:
+        raise ValueError(f"Nothing to import; expected some of {', '.join(INVENTORY_COLUMNS)}")
+    return columns
+
+
+class _Report:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.rejected = 0
+        self.rejects = []
+
+    def reject(self, line, product_id, error):
+        self.rejected += 1
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            self.rejects.append({"line": line, "id": product_id, "error": error})
+
+
+def _validate(values, columns):
+    if len(values) != len(columns):
+        raise ValueError(f"Expected {len(columns)} fields, got {len(values)}")
+    return {
+        column: _int(value, "id") if column == "id" else INVENTORY_COLUMNS[column](value)
+        for column, value in zip(columns, values)
+    }
+
+
+def _import_batch(batch, columns, report):
+    # {id: (line, fields)}; a later row for the same id wins, as ON CONFLICT
+    # cannot touch one row twice in a statement
+    rows = {}
+    id_index = columns.index("id")
+    for line, values in batch:
+        try:
+            fields = _validate(values, columns)
+        except ValueError as e:
+            product_id = values[id_index] if len(values) > id_index else None
+            report.reject(line, product_id, str(e))
+            continue
+        rows[fields["id"]] = (line, fields)
+
+    creatable = all(column in columns for column in CREATE_COLUMNS)
+    if not creatable:
+        existing = set(Product.objects.filter(id__in=list(rows)).values_list("id", flat=True))
+        for product_id in set(rows) - existing:
+            line, _ = rows.pop(product_id)
+            report.reject(line, product_id, "Unknown product; title and price_inr are required to create it")
+
+    if not rows:
+        return
+
+    products = [Product(**fields) for _, fields in rows.values()]
+    update_fields = [column for column in columns if column != "id"]
+    try:
+        with transaction.atomic():
+            if creatable:
+                Product.objects.bulk_create(
+                    products, update_conflicts=True, unique_fields=["id"], update_fields=update_fields
+                )
+            else:
+                # The INSERT half of an upsert would fail NOT NULL checks
+                Product.objects.bulk_update(products, update_fields)
+    except DatabaseError as e:
+        logger.exception("[InventoryImport] Batch failed")
+        for product_id, (line, _) in rows.items():
+            report.reject(line, product_id, f"Database error: {e}")
+        return
+
+    report.imported += len(rows)
+    invalidate_products(rows)
+
+
+def import_inventory(file, batch_size=INVENTORY_IMPORT_BATCH_SIZE):
+    """
+    Upserts products from a CSV text stream with an `id` column and any of
+    title, price_inr, category, stock, is_active. Raises ValueError if the
+    header is unusable; row problems are reported, not raised. If the file
+    stops parsing part way, the rows before that point are still imported
+    and `error` says where it stopped.
+    Returns {rows, imported, rejected, rejects: [{line, id, error}],
+    error: {line, message} or None, seconds, rows_per_second}.
+    """
+    start = time.perf_counter()
+    reader = csv.reader(file)
+    columns = read_header(reader)
+    report = _Report()
+    error = None
+
+    batch = []
+    try:
+        for values in reader:
+            if not values:
+                continue
+            report.rows += 1
+            batch.append((reader.line_num, values))
+            if len(batch) >= batch_size:
+                _import_batch(batch, columns, report)
+                batch = []
+    except csv.Error as e:
+        error = {"line": reader.line_num, "message": f"Malformed CSV: {e}"}
+    except UnicodeDecodeError:
+        error = {"line": reader.line_num + 1, "message": "File is not valid UTF-8"}
+    if batch:
+        _import_batch(batch, columns, report)
+    if error:
+        logger.warning(f"[InventoryImport] Stopped at line {error['line']}: {error['message']}")
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": report.rows,
+        "imported": report.imported,
+        "rejected": report.rejected,
+        "rejects": report.rejects,
+        "error": error,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(report.rows / seconds) if seconds else 0,
+    }
@@ -0,0 +1,141 @@
+import datetime
+import logging
+import multiprocessing
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .invoice_template import invoice_customer, render_invoice_payload
+from .invoices import get_invoice_storage, invoice_name
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+INVOICE_EXPORT_WORKERS = getattr(settings, "INVOICE_EXPORT_WORKERS", 4)
+
+
+# ==================================================
+# BULK INVOICE EXPORT
+# ==================================================
+
+def orders_between(start, end):
+    """
+    Orders created on dates start..end (inclusive), oldest first.
+    Bounds are converted to datetimes so the filter stays a plain range.
+    """
+    tz = timezone.get_current_timezone()
+    since = datetime.datetime.combine(start, datetime.time.min, tzinfo=tz)
+    until = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+    return (
+        Order.objects.filter(created_at__gte=since, created_at__lt=until)
+        .select_related("user")
+        .order_by("created_at", "id")
+    )
+
+
+def invoice_payload(order):
+    username, email = invoice_customer(order)
+    return {
+        "id": order.id,
+        "username": username,
+        "email": email,
+        "total": order.total,
+        "paid_at": order.paid_at,
+        "created_at": order.created_at,
+        "items": order.items,
+    }
+
+
+class _ZipSink:
+    """
+    Write-only, non-seekable file for ZipFile; the caller drains what was
+    written after each member so the archive is never held in memory.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_invoice_zip(orders, workers=None, chunk_size=200):
+    """
+    Yields a ZIP archive of invoice_<id>.pdf members for `orders`.
+    Cached invoices are copied straight from storage; the rest are rendered
+    across a process pool (at most workers * 4 in flight) and added as they
+    complete, then stored in the invoice cache.
+    With workers=0 everything renders in this process.
+    """
+    workers = INVOICE_EXPORT_WORKERS if workers is None else workers
+    storage = get_invoice_storage()
+    sink = _ZipSink()
+    names = {}
+    pending = {}
+    failed = []
+    pool = None
+    if workers:
+        # spawn: forking a threaded web worker is not safe
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def add(archive, order_id, pdf, cached):
+        archive.writestr(f"invoice_{order_id}.pdf", pdf)
+        name = names.pop(order_id)
+        if not cached:
+            saved = storage.save(name, ContentFile(pdf))
+            if saved != name:
+                storage.delete(saved)
+
+    def collect(archive):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            order_id = pending.pop(future)
+            try:
+                add(archive, *future.result(), cached=False)
+            except Exception:
+                # One bad order must not truncate the whole archive
+                logger.exception(f"[InvoiceExport] Render failed for order #{order_id}")
+                names.pop(order_id, None)
+                failed.append(order_id)
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for order in orders.iterator(chunk_size=chunk_size):
+                names[order.id] = invoice_name(order)
+                if storage.exists(names[order.id]):
+                    with storage.open(names[order.id], "rb") as f:
+                        add(archive, order.id, f.read(), cached=True)
+                elif pool is None:
+                    add(archive, *render_invoice_payload(invoice_payload(order)), cached=False)
+                else:
+                    pending[pool.submit(render_invoice_payload, invoice_payload(order))] = order.id
+                    if len(pending) >= workers * 4:
+                        collect(archive)
+
+                data = sink.drain()
+                if data:
+                    yield data
+
+            while pending:
+                collect(archive)
+                yield sink.drain()
+
+            if failed:
+                archive.writestr("FAILED.txt", "\n".join(f"order #{order_id}" for order_id in failed))
+
+        yield sink.drain()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,171 @@
+import functools
+import io
+from types import SimpleNamespace
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing, Line, Rect, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# ==================================================
+# INVOICE TEMPLATE
+# The static part of the page (branding, labels, table grid, footer) is a
+# Drawing built once per process and emitted once per PDF as a form
+# XObject; every page references it, and only per-order text is stamped.
+# ==================================================
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+BRAND_COLOR = colors.HexColor("#1f2937")
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+
+TABLE_TOP = 640
+ROW_HEIGHT = 18
+ROWS_PER_PAGE = 26
+TABLE_BOTTOM = TABLE_TOP - ROW_HEIGHT * (ROWS_PER_PAGE + 1)
+
+# (heading, x of the text anchor, alignment)
+COLUMNS = [
+    ("Item", MARGIN + 6, "start"),
+    ("Qty", 370, "end"),
+    ("Unit price (INR)", 460, "end"),
+    ("Amount (INR)", PAGE_WIDTH - MARGIN - 6, "end"),
+]
+COLUMN_RULES = [MARGIN, 320, 376, 466, PAGE_WIDTH - MARGIN]
+TITLE_WIDTH = COLUMN_RULES[1] - COLUMN_RULES[0] - 12
+
+LAYOUT_FORM = "invoice_layout"
+
+# Orders outlive their users (Order.user is SET_NULL)
+DELETED_USER = "Deleted User"
+
+
+@functools.lru_cache(maxsize=None)
+def static_layout():
+    d = Drawing(PAGE_WIDTH, PAGE_HEIGHT)
+
+    # Header / branding
+    d.add(Rect(0, PAGE_HEIGHT - 80, PAGE_WIDTH, 80, fillColor=BRAND_COLOR, strokeColor=None))
+    d.add(String(MARGIN, PAGE_HEIGHT - 50, "RRR Shopkart", fontName=FONT_BOLD, fontSize=22,
+                 fillColor=colors.white))
+    d.add(String(PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 50, "INVOICE", fontName=FONT_BOLD, fontSize=16,
+                 fillColor=colors.white, textAnchor="end"))
+
+    for i, label in enumerate(["Order ID:", "Date:", "Customer:", "Email:"]):
+        d.add(String(MARGIN, 730 - i * 18, label, fontName=FONT_BOLD, fontSize=10))
+
+    # Item table: heading band, row rules and column rules
+    d.add(Rect(MARGIN, TABLE_TOP - ROW_HEIGHT, PAGE_WIDTH - 2 * MARGIN, ROW_HEIGHT,
+               fillColor=colors.HexColor("#e5e7eb"), strokeColor=None))
+    for heading, x, anchor in COLUMNS:
+        d.add(String(x, TABLE_TOP - 13, heading, fontName=FONT_BOLD, fontSize=9, textAnchor=anchor))
+
+    grid = colors.HexColor("#9ca3af")
+    for row in range(ROWS_PER_PAGE + 2):
+        y = TABLE_TOP - row * ROW_HEIGHT
+        d.add(Line(MARGIN, y, PAGE_WIDTH - MARGIN, y, strokeColor=grid, strokeWidth=0.5))
+    for x in COLUMN_RULES:
+        d.add(Line(x, TABLE_TOP, x, TABLE_BOTTOM, strokeColor=grid, strokeWidth=0.5))
+
+    # Footer
+    d.add(Line(MARGIN, 60, PAGE_WIDTH - MARGIN, 60, strokeColor=BRAND_COLOR, strokeWidth=1))
+    d.add(String(MARGIN, 45, "Thank you for shopping with RRR Shopkart.", fontName=FONT, fontSize=8))
+
+    return d
+
+
+def _fit(text, width, size=9):
+    text = str(text)
+    if stringWidth(text, FONT, size) <= width:
+        return text
+    while text and stringWidth(text + "...", FONT, size) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def invoice_customer(order):
+    """
+    (username, email) printed on the invoice.
+    """
+    if order.user is None:
+        return DELETED_USER, ""
+    return order.user.username, order.user.email
+
+
+def _stamp_header(pdf, order, page, pages):
+    pdf.setFont(FONT, 10)
+    created_at = order.paid_at or order.created_at
+    for i, value in enumerate([
+        f"#{order.id}",
+        created_at.strftime("%d %b %Y") if created_at else "",
+        *invoice_customer(order),
+    ]):
+        pdf.drawString(MARGIN + 70, 730 - i * 18, value)
+
+    pdf.setFont(FONT, 8)
+    pdf.drawRightString(PAGE_WIDTH - MARGIN, 45, f"Page {page} of {pages}")
+
+
+def _stamp_rows(pdf, rows):
+    # One text object per page instead of a BT/ET block per cell
+    text = pdf.beginText()
+    text.setFont(FONT, 9)
+    y = TABLE_TOP - ROW_HEIGHT - 13
+    for item in rows:
+        qty = item.get("quantity", 0)
+        price = item.get("price", 0)
+        text.setTextOrigin(COLUMNS[0][1], y)
+        text.textOut(_fit(item.get("title", ""), TITLE_WIDTH))
+        for (_, x, _), value in zip(COLUMNS[1:], (qty, price, price * qty)):
+            value = str(value)
+            text.setTextOrigin(x - stringWidth(value, FONT, 9), y)
+            text.textOut(value)
+        y -= ROW_HEIGHT
+    pdf.drawText(text)
+
+
+def _stamp_total(pdf, order):
+    pdf.setFont(FONT_BOLD, 11)
+    pdf.drawRightString(COLUMNS[2][1], TABLE_BOTTOM - 25, "Total Paid (INR)")
+    pdf.drawRightString(COLUMNS[3][1], TABLE_BOTTOM - 25, str(order.total))
+
+
+def render_invoice_pdf(order):
+    """
+    Renders the invoice for `order` (with `user` loaded) and returns the
+    PDF bytes. Large orders continue on further pages with the same layout.
+    """
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+
+    pdf.beginForm(LAYOUT_FORM)
+    renderPDF.draw(static_layout(), pdf, 0, 0)
+    pdf.endForm()
+
+    rows = order.items or []
+    pages = [rows[i:i + ROWS_PER_PAGE] for i in range(0, len(rows), ROWS_PER_PAGE)] or [[]]
+
+    for number, page_rows in enumerate(pages, start=1):
+        pdf.doForm(LAYOUT_FORM)
+        _stamp_header(pdf, order, number, len(pages))
+        _stamp_rows(pdf, page_rows)
+        if number == len(pages):
+            _stamp_total(pdf, order)
+        pdf.showPage()
+
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render_invoice_payload(payload):
+    """
+    Process-pool entry point: renders from a plain dict (see
+    invoice_export.invoice_payload) so workers need neither Django nor a
+    database connection. Returns (order_id, pdf bytes).
+    """
+    user = SimpleNamespace(username=payload["username"], email=payload["email"])
+    order = SimpleNamespace(user=user, **{k: v for k, v in payload.items() if k not in ("username", "email")})
+    return payload["id"], render_invoice_pdf(order)
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils.module_loading import import_string
+
+from .invoice_template import invoice_customer, render_invoice_pdf as render_invoice
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the rendered layout changes; old files are simply never
+# looked up again.
+INVOICE_TEMPLATE_VERSION = 2
+
+
+# ==================================================
+# STORAGE
+# ==================================================
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_invoice_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = import_string(settings.INVOICE_STORAGE)(**settings.INVOICE_STORAGE_OPTIONS)
+    return _storage
+
+
+def reset_invoice_storage():
+    global _storage
+    _storage = None
+
+
+# ==================================================
+# RENDERING
+# ==================================================
+
+def _render_inputs(order):
+    return (
+        INVOICE_TEMPLATE_VERSION, order.id, *invoice_customer(order), order.total,
+        order.paid_at or order.created_at, order.items,
+    )
+
+
+def invoice_digest(order):
+    """
+    Content address: everything that ends up on the page, so a changed
+    customer email renders a new file instead of serving a stale one.
+    """
+    return hashlib.sha256(repr(_render_inputs(order)).encode()).hexdigest()
+
+
+def invoice_name(order):
+    return f"v{INVOICE_TEMPLATE_VERSION}/{order.id}-{invoice_digest(order)[:20]}.pdf"
+
+
+def ensure_invoice(order):
+    """
+    Returns the storage name of the order's invoice, rendering and storing
+    it on first use.
+    """
+    storage = get_invoice_storage()
+    name = invoice_name(order)
+    if storage.exists(name):
+        return name
+
+    saved = storage.save(name, ContentFile(render_invoice(order)))
+    if saved != name:
+        # A concurrent render won; its file is identical
+        storage.delete(saved)
+    return name
+
+
+def prerender_invoice(order_id):
+    """
+    Called on commit of the payment webhook (in the webhook worker), so the
+    first download is already a cache hit. Never raises.
+    """
+    try:
+        order = Order.objects.select_related("user").get(id=order_id)
+        ensure_invoice(order)
+    except Exception:
+        logger.exception(f"[Invoice] Pre-render failed for order #{order_id}")
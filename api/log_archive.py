@@ -0,0 +1,149 @@
+import datetime
+import gzip
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .exports import EXPORT_CHUNK_SIZE, LOG_FIELDS, batched, export_lines, logs_queryset
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_RETENTION_DAYS = getattr(settings, "ACTIVITY_LOG_RETENTION_DAYS", 90)
+ACTIVITY_ARCHIVE_DIR = getattr(settings, "ACTIVITY_ARCHIVE_DIR", "activity_archive")
+
+
+# ==================================================
+# ACTIVITY LOG ARCHIVE
+# Cold entries live in one gzipped JSONL file per day:
+#   <ACTIVITY_ARCHIVE_DIR>/YYYY/MM/YYYY-MM-DD.jsonl.gz
+# Each chunk is appended as its own gzip member, which gzip readers
+# treat as one continuous stream.
+# ==================================================
+
+def archive_path(day, root=None):
+    root = root or ACTIVITY_ARCHIVE_DIR
+    return os.path.join(root, f"{day:%Y}", f"{day:%m}", f"{day:%Y-%m-%d}.jsonl.gz")
+
+
+def _append(day, lines, root):
+    path = archive_path(day, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write("".join(lines).encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_logs(days=ACTIVITY_LOG_RETENTION_DAYS, chunk_size=5000, pause=0.0, now=None, root=None):
+    """
+    Moves entries older than `days` days into the archive, oldest first,
+    one chunk per transaction: the chunk is appended to its day files
+    before its rows are deleted. A crash between the two can only leave
+    duplicates (same id), never lose entries; readers skip duplicates.
+    Returns the number of entries archived.
+    """
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=days)
+    names = [name for name, _ in LOG_FIELDS]
+    columns = [column for _, column in LOG_FIELDS]
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                ActivityLog.objects.filter(timestamp__lt=cutoff)
+                .order_by("timestamp", "id")
+                .values_list(*columns)[:chunk_size]
+            )
+            if not rows:
+                break
+
+            by_day = {}
+            for row in rows:
+                day = timezone.localdate(row[names.index("timestamp")])
+                by_day.setdefault(day, []).append(row)
+            for day, day_rows in by_day.items():
+                _append(day, list(export_lines(day_rows, names, "ndjson")), root)
+
+            ActivityLog.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+        archived += len(rows)
+        logger.info(f"[LogArchive] Archived {archived} entries older than {cutoff:%Y-%m-%d}")
+        if pause:
+            time.sleep(pause)
+
+    return archived
+
+
+def _archived_entries(start, end, root):
+    day = start
+    while day <= end:
+        path = archive_path(day, root)
+        if os.path.exists(path):
+            seen = set()
+            with gzip.open(path, "rt") as f:
+                for line in f:
+                    entry_id = json.loads(line)["id"]
+                    if entry_id not in seen:
+                        seen.add(entry_id)
+                        yield entry_id, line
+        day += datetime.timedelta(days=1)
+
+
+def archived_lines(start, end, root=None):
+    """
+    Yields the archived NDJSON lines for days start..end (inclusive),
+    oldest first, reading one decompressed line at a time.
+    """
+    for _, line in _archived_entries(start, end, root):
+        yield line
+
+
+def _newest_archived_day(start, end, root):
+    day = end
+    while day >= start:
+        if os.path.exists(archive_path(day, root)):
+            return day
+        day -= datetime.timedelta(days=1)
+    return None
+
+
+def stream_log_range(start, end, since, until, root=None):
+    """
+    NDJSON for a date range across both tiers: archived days first (they
+    are all older than anything still in the table), then live rows.
+    Entries a crashed archive run wrote out but never deleted are still
+    in the table too; they are streamed once, from the archive.
+    """
+    live = logs_queryset(since, until)
+
+    # Only live rows dated up to the newest archived day can also be in the
+    # archive: the partly archived cutoff day plus any crash leftovers
+    overlap = set()
+    newest = _newest_archived_day(start, end, root)
+    if newest:
+        bound = datetime.datetime.combine(
+            newest + datetime.timedelta(days=1), datetime.time.min, tzinfo=timezone.get_current_timezone()
+        )
+        overlap = set(live.filter(timestamp__lt=bound).values_list("id", flat=True))
+
+    duplicates = []
+
+    def archived():
+        for entry_id, line in _archived_entries(start, end, root):
+            if entry_id in overlap:
+                duplicates.append(entry_id)
+            yield line
+
+    yield from batched(archived())
+    # Evaluated only now, once every archived id has been seen
+    rows = live.exclude(id__in=duplicates).values_list(*[column for _, column in LOG_FIELDS])
+    yield from batched(export_lines(
+        rows.iterator(chunk_size=EXPORT_CHUNK_SIZE), [name for name, _ in LOG_FIELDS], "ndjson"
+    ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.log_archive import ACTIVITY_LOG_RETENTION_DAYS, archive_logs
+
+
+class Command(BaseCommand):
+    help = "Moves activity logs older than the retention period into gzipped, per-day JSONL archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ACTIVITY_LOG_RETENTION_DAYS, help="Keep this many days in the table")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+
+    def handle(self, *args, **options):
+        archived = archive_logs(
+            days=options["days"],
+            chunk_size=options["chunk_size"],
+            pause=options["pause"]
+        )
+        self.stdout.write(f"Archived {archived} activity log entries")
@@ -0,0 +1,39 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.invoice_export import INVOICE_EXPORT_WORKERS, orders_between, stream_invoice_zip
+
+
+class Command(BaseCommand):
+    help = "Writes the invoices of orders created in a date range to a ZIP archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", required=True, help="First day, YYYY-MM-DD")
+        parser.add_argument("--to", dest="end", required=True, help="Last day (inclusive), YYYY-MM-DD")
+        parser.add_argument("--output", help="Archive path (default invoices_<from>_<to>.zip)")
+        parser.add_argument("--workers", type=int, default=INVOICE_EXPORT_WORKERS,
+                            help="Render processes; 0 renders in this process")
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.date.fromisoformat(options["start"])
+            end = datetime.date.fromisoformat(options["end"])
+        except ValueError:
+            raise CommandError("--from and --to must be YYYY-MM-DD dates")
+
+        output = options["output"] or f"invoices_{start}_{end}.zip"
+        orders = orders_between(start, end)
+
+        started = time.perf_counter()
+        written = 0
+        with open(output, "wb") as f:
+            for chunk in stream_invoice_zip(orders, workers=options["workers"]):
+                f.write(chunk)
+                written += len(chunk)
+
+        self.stdout.write(
+            f"Exported {orders.count()} invoices to {output} "
+            f"({written / 1024:.0f} KiB in {time.perf_counter() - started:.1f}s)"
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.inventory_import import INVENTORY_IMPORT_BATCH_SIZE, import_inventory
+
+
+class Command(BaseCommand):
+    help = "Creates or updates products from a CSV file (id plus any of title, price_inr, category, stock, is_active)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row")
+        parser.add_argument("--batch-size", type=int, default=INVENTORY_IMPORT_BATCH_SIZE,
+                            help="Rows validated and upserted per transaction")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as f:
+                result = import_inventory(f, batch_size=options["batch_size"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for reject in result["rejects"]:
+            self.stdout.write(f"Rejected line {reject['line']} (id {reject['id']}): {reject['error']}")
+        if result["rejected"] > len(result["rejects"]):
+            self.stdout.write(f"... {result['rejected'] - len(result['rejects'])} more rejects not shown")
+
+        self.stdout.write(
+            f"Imported {result['imported']} of {result['rows']} rows, rejected {result['rejected']} "
+            f"({result['seconds']:.2f}s, {result['rows_per_second']} rows/s)"
+        )
+        if result["error"]:
+            raise CommandError(
+                f"Stopped at line {result['error']['line']}: {result['error']['message']}; "
+                "rows before it were imported"
+            )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.webhooks import process_pending
+
+
+class Command(BaseCommand):
+    help = "Processes queued Stripe webhook events from the inbox table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--once", action="store_true", help="Process a single batch and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            statuses = process_pending(
+                batch_size=options["batch_size"],
+                concurrency=options["concurrency"]
+            )
+            if statuses:
+                self.stdout.write(
+                    f"Processed {len(statuses)} events: {statuses.count('done')} done, "
+                    f"{statuses.count('pending')} retrying, {statuses.count('failed')} failed"
+                )
+
+            if options["once"]:
+                return
+            if not statuses:
+                time.sleep(options["poll_interval"])
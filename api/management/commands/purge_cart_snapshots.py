@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.snapshots import CART_SNAPSHOT_TTL, purge_expired_snapshots
+
+
+class Command(BaseCommand):
+    help = "Deletes abandoned CartSnapshot rows older than the expiry policy, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl", type=int, default=CART_SNAPSHOT_TTL, help="Age in seconds")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_snapshots(
+            ttl=options["ttl"],
+            chunk_size=options["chunk_size"],
+            pause=options["pause"]
+        )
+        self.stdout.write(f"Purged {deleted} cart snapshots")
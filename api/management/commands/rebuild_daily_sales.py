@@ -0,0 +1,23 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.sales import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = "Recomputes the DailySales analytics rollup from orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild days from this date (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a YYYY-MM-DD date")
+
+        days = rebuild_daily_sales(since)
+        self.stdout.write(f"Rebuilt {days} days of sales")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Releases expired checkout stock reservations in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            released = release_expired(batch_size=options["batch_size"])
+            total += released
+            if released < options["batch_size"]:
+                break
+
+        self.stdout.write(f"Released {total} expired reservations")
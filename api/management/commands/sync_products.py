@@ -0,0 +1,44 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.product_sync import (
+    PRODUCT_SYNC_CHUNK_SIZE, PRODUCT_SYNC_PAGE_SIZE, PRODUCT_SYNC_READ_TIMEOUT, PRODUCT_SYNC_URL,
+    PRODUCT_SYNC_WORKERS, ProductSource, sync_products,
+)
+
+
+class Command(BaseCommand):
+    help = "Pulls the upstream product catalogue and upserts the products that changed since the last sync"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default=PRODUCT_SYNC_URL)
+        parser.add_argument("--page-size", type=int, default=PRODUCT_SYNC_PAGE_SIZE)
+        parser.add_argument("--workers", type=int, default=PRODUCT_SYNC_WORKERS, help="Concurrent page requests")
+        parser.add_argument("--timeout", type=float, default=PRODUCT_SYNC_READ_TIMEOUT, help="Read timeout in seconds")
+        parser.add_argument("--chunk-size", type=int, default=PRODUCT_SYNC_CHUNK_SIZE,
+                            help="Products compared and upserted per statement")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Fetching products from {options['url']}...")
+        source = ProductSource(
+            url=options["url"],
+            page_size=options["page_size"],
+            workers=options["workers"],
+            read_timeout=options["timeout"],
+        )
+        try:
+            result = sync_products(source, chunk_size=options["chunk_size"])
+        except (requests.RequestException, ValueError) as e:
+            raise CommandError(f"Sync failed: {e}")
+        finally:
+            source.close()
+
+        self.stdout.write(
+            f"Synced {result['fetched']} products: {result['created']} created, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged, {result['invalid']} invalid ({result['seconds']:.2f}s)"
+        )
+        if result["failed_pages"]:
+            raise CommandError(
+                f"{len(result['failed_pages'])} pages failed: "
+                + ", ".join(f"skip={page['skip']} ({page['error']})" for page in result["failed_pages"])
+            )
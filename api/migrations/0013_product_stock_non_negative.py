@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+def clamp_negative_stock(apps, schema_editor):
+    Product = apps.get_model("api", "Product")
+    Product.objects.filter(stock__lt=0).update(stock=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_alter_activitylog_user_alter_order_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_negative_stock, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(check=models.Q(('stock__gte', 0)), name='product_stock_non_negative'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_row_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('unit_price', models.IntegerField(help_text='Price in INR at purchase time')),
+                ('quantity', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='api.order')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='order_items', to='api.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'created_at'], name='orderitem_product_created_idx'), models.Index(fields=['created_at'], name='orderitem_created_idx')],
+            },
+        ),
+    ]
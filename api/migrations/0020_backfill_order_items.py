@@ -0,0 +1,55 @@
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+
+
+def backfill_order_items(apps, schema_editor):
+    """
+    Copies Order.items into OrderItem rows, CHUNK_SIZE orders per
+    transaction (keyset on id), skipping orders that already have rows so
+    an interrupted run can simply be re-applied.
+    """
+    Order = apps.get_model("api", "Order")
+    OrderItem = apps.get_model("api", "OrderItem")
+
+    last_id = 0
+    while True:
+        orders = list(
+            Order.objects.filter(id__gt=last_id, order_items__isnull=True)
+            .order_by("id")
+            .values_list("id", "created_at", "items")[:CHUNK_SIZE]
+        )
+        if not orders:
+            break
+
+        rows = [
+            OrderItem(
+                order_id=order_id,
+                product_id=item["product_id"],
+                title=str(item.get("title", ""))[:255],
+                unit_price=item.get("price", 0),
+                quantity=item.get("quantity", 0),
+                created_at=created_at,
+            )
+            for order_id, created_at, items in orders
+            for item in (items or [])
+            if isinstance(item, dict) and item.get("product_id") is not None
+        ]
+        with transaction.atomic():
+            OrderItem.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+
+        last_id = orders[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    # One transaction per chunk instead of one for the whole table
+    atomic = False
+
+    dependencies = [
+        ('api', '0019_orderitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:01
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_daily_sales(apps, schema_editor):
+    # Initial rollup from history; later rebuilds: manage.py rebuild_daily_sales
+    Order = apps.get_model("api", "Order")
+    OrderItem = apps.get_model("api", "OrderItem")
+    DailySales = apps.get_model("api", "DailySales")
+
+    units = dict(
+        OrderItem.objects.annotate(day=TruncDate("created_at"))
+        .values("day").annotate(units=Sum("quantity")).values_list("day", "units")
+    )
+    DailySales.objects.bulk_create([
+        DailySales(date=row["day"], order_count=row["n"], revenue=row["revenue"] or 0, units=units.get(row["day"]) or 0)
+        for row in Order.objects.annotate(day=TruncDate("created_at"))
+        .values("day").annotate(n=Count("id"), revenue=Sum("total"))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_backfill_order_items'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0, help_text='INR')),
+                ('units', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'daily sales',
+            },
+        ),
+        migrations.RunPython(build_daily_sales, migrations.RunPython.noop),
+    ]
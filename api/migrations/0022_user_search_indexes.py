@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import migrations
+
+# Case-insensitive prefix indexes for the admin user search
+# (username__istartswith / email__istartswith), per database vendor.
+INDEXES = {
+    # Django compiles istartswith to UPPER(col) LIKE UPPER(%s); pattern_ops
+    # lets a btree serve LIKE 'abc%' regardless of the database collation.
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS {name} ON {table} (UPPER({column}) varchar_pattern_ops)",
+    ],
+    # SQLite's LIKE is case-insensitive; only a NOCASE index is usable by it.
+    "sqlite": [
+        "CREATE INDEX IF NOT EXISTS {name} ON {table} ({column} COLLATE NOCASE)",
+    ],
+    # MySQL's default collations are case-insensitive already.
+    "mysql": [
+        "CREATE INDEX {name} ON {table} ({column})",
+    ],
+}
+COLUMNS = ["username", "email"]
+
+
+def _statements(schema_editor, apps, template):
+    table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    quote = schema_editor.quote_name
+    for column in COLUMNS:
+        name = f"{table}_{column}_prefix_idx"
+        yield template.format(name=quote(name), table=quote(table), column=quote(column)), name
+
+
+def create_indexes(apps, schema_editor):
+    for template in INDEXES.get(schema_editor.connection.vendor, []):
+        for sql, _ in _statements(schema_editor, apps, template):
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for template in INDEXES.get(vendor, []):
+        for _, name in _statements(schema_editor, apps, template):
+            table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+            on_table = f" ON {schema_editor.quote_name(table)}" if vendor == "mysql" else ""
+            schema_editor.execute(f"DROP INDEX {schema_editor.quote_name(name)}{on_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_dailysales'),
+        # After every auth_user alteration: SQLite rebuilds the table on
+        # ALTER and would drop these raw indexes.
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
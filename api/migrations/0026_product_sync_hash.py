@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_activitylog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sync_hash',
+            field=models.CharField(blank=True, default='', help_text='Digest of the upstream record last written by sync_products', max_length=64),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
@@ -37,6 +38,11 @@ class Profile(models.Model):
         ]
     )
 
+    # Row version for conditional GETs on /me/
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
     def __str__(self):
         return self.user.username if self.user else "Deleted User"
 
@@ -53,7 +59,15 @@ class ActivityLog(models.Model):
         blank=True
     )
     action = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens; buffered entries are written later
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # list_logs keyset pages (all users / one user) and the archiver
+            models.Index(fields=["-timestamp", "-id"], name="activitylog_time_idx"),
+            models.Index(fields=["user", "-timestamp", "-id"], name="activitylog_user_time_idx"),
+        ]
 
     def __str__(self):
         user_str = self.user.username if self.user else "Anonymous"
@@ -105,6 +119,12 @@ class Order(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = [
+            # my_orders keyset pagination: newest first per user
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.user.username if self.user else 'Deleted User'}"
 
@@ -147,6 +167,11 @@ class Address(models.Model):
         auto_now_add=True
     )
 
+    # Row version for conditional GETs on /address/
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
     def __str__(self):
         return f"{self.user.username if self.user else 'Deleted User'} - {self.city}"
 
@@ -162,6 +187,24 @@ class Product(models.Model):
     category = models.CharField(max_length=100, blank=True)
     stock = models.IntegerField(default=10, help_text="Stock Quantity")
     is_active = models.BooleanField(default=True, help_text="Product Visibility/Availability")
+    reserved = models.IntegerField(default=0, help_text="Quantity held by active checkout reservations")
+    sync_hash = models.CharField(
+        max_length=64, blank=True, default="",
+        help_text="Digest of the upstream record last written by sync_products"
+    )
+
+    class Meta:
+        constraints = [
+            # Conditional decrements can never oversell
+            models.CheckConstraint(
+                check=models.Q(stock__gte=0),
+                name="product_stock_non_negative"
+            ),
+            models.CheckConstraint(
+                check=models.Q(reserved__gte=0),
+                name="product_reserved_non_negative"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} (₹{self.price_inr})"
@@ -177,7 +220,7 @@ class CartSnapshot(models.Model):
         unique=True,
         db_index=True
     )
-    items = models.JSONField()  # [{product_id, quantity}]
+    items = models.JSONField()  # [{product_id, quantity, price_inr}]
     created_at = models.DateTimeField(
         auto_now_add=True,
         db_index=True
@@ -185,4 +228,169 @@ class CartSnapshot(models.Model):
 
     def __str__(self):
         return f"Snapshot - {self.stripe_session_id}"
-
\ No newline at end of file
+
+
+
+
+# ============================
+# WebhookEvent Model (Inbox)
+# ============================
+
+class WebhookEvent(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    event_id = models.CharField(
+        max_length=255,
+        unique=True
+    )
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()  # Raw, signature-verified Stripe event
+
+    status = models.CharField(
+        max_length=20,
+        default=STATUS_PENDING,
+        choices=[
+            (STATUS_PENDING, "Pending"),
+            (STATUS_PROCESSING, "Processing"),
+            (STATUS_DONE, "Done"),
+            (STATUS_FAILED, "Failed"),
+        ]
+    )
+    attempts = models.IntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # Set after a failed attempt; the event is not claimed again before then
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim queries: oldest pending events first
+            models.Index(fields=["status", "received_at"], name="webhook_status_received_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} - {self.event_id} ({self.status})"
+
+
+
+# ============================
+# ProcessedStripeEvent Model (Idempotency Ledger)
+# ============================
+
+class ProcessedStripeEvent(models.Model):
+    # Claimed with an INSERT before any work; a retry or a second event for
+    # the same session fails on one of these unique indexes.
+    event_id = models.CharField(
+        max_length=255,
+        unique=True
+    )
+    stripe_session_id = models.CharField(
+        max_length=255,
+        unique=True
+    )
+    processed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.stripe_session_id}"
+
+
+
+# ============================
+# StockReservation Model
+# ============================
+
+class StockReservation(models.Model):
+    STATUS_ACTIVE = "active"
+    STATUS_COMMITTED = "committed"
+    STATUS_RELEASED = "released"
+
+    # Set once the Stripe session exists; the snapshot owns the reservation
+    snapshot = models.ForeignKey(
+        CartSnapshot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reservations"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE
+    )
+    quantity = models.IntegerField()
+    status = models.CharField(
+        max_length=20,
+        default=STATUS_ACTIVE,
+        choices=[
+            (STATUS_ACTIVE, "Active"),
+            (STATUS_COMMITTED, "Committed"),
+            (STATUS_RELEASED, "Released"),
+        ]
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Sweeper: expired holds that are still active
+            models.Index(fields=["status", "expires_at"], name="reservation_status_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x Product #{self.product_id} ({self.status})"
+
+
+# ============================
+# OrderItem Model (normalised Order.items)
+# ============================
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="order_items"
+    )
+    # No FK constraint: sales history outlives deleted/resynced products
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="order_items"
+    )
+    title = models.CharField(max_length=255)
+    unit_price = models.IntegerField(help_text="Price in INR at purchase time")
+    quantity = models.IntegerField()
+    # Copy of Order.created_at so per-product time ranges need no join
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "created_at"], name="orderitem_product_created_idx"),
+            models.Index(fields=["created_at"], name="orderitem_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.title} (Order #{self.order_id})"
+
+
+# ============================
+# DailySales Model (analytics rollup)
+# ============================
+
+class DailySales(models.Model):
+    date = models.DateField(unique=True)
+    order_count = models.IntegerField(default=0)
+    revenue = models.BigIntegerField(default=0, help_text="INR")
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "daily sales"
+
+    def __str__(self):
+        return f"{self.date}: {self.order_count} orders, ₹{self.revenue}"
@@ -0,0 +1,60 @@
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# ==================================================
+# KEYSET CURSORS
+# ==================================================
+
+def encode_cursor(*values):
+    """
+    Opaque, URL-safe token for a (sort key..., id) position.
+    """
+    raw = json.dumps([
+        v.isoformat() if isinstance(v, datetime.datetime) else v
+        for v in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, *types):
+    """
+    Inverse of encode_cursor; `types` converts each position
+    (datetime.datetime values are parsed from ISO format).
+    Raises ValueError for malformed tokens.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+
+    try:
+        return [
+            datetime.datetime.fromisoformat(v) if t is datetime.datetime else t(v)
+            for v, t in zip(values, types)
+        ]
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def before(field, value, last_id):
+    """
+    Rows strictly after (value, last_id) in `-field, -id` order.
+    """
+    return Q(**{f"{field}__lt": value}) | Q(**{field: value, "id__lt": last_id})
+
+
+def with_next_cursor(response, cursor):
+    if cursor:
+        response[NEXT_CURSOR_HEADER] = cursor
+    return response
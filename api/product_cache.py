@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Product
+
+
+# ============================
+# Product Cache (read-through)
+# ============================
+
+# Bump whenever the cached Product shape changes so that old entries
+# written by a previous deploy are simply never read again.
+PRODUCT_CACHE_VERSION = 2
+
+PRODUCT_CACHE_TTL = getattr(settings, "PRODUCT_CACHE_TTL", 300)
+
+# Missing products are cached briefly so that stale carts pointing at
+# deleted products do not hit the database on every checkout.
+MISSING_PRODUCT_TTL = getattr(settings, "MISSING_PRODUCT_TTL", 60)
+
+_MISSING = "__missing__"
+
+# Shared counter bumped on every catalog write; per-worker snapshots
+# (see api.catalog) rebuild when it moves.
+CATALOG_GENERATION_KEY = f"catalog:v{PRODUCT_CACHE_VERSION}:generation"
+
+
+def product_cache_key(product_id):
+    return f"product:v{PRODUCT_CACHE_VERSION}:{product_id}"
+
+
+def get_products(product_ids):
+    """
+    Returns {id: Product} for the given ids, reading from the shared cache
+    first and populating it from a single id__in query on misses.
+    Ids that do not exist in the database are absent from the result.
+    Without a shared cache (settings.PRODUCT_CACHE) this is just the query.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+
+    if not settings.PRODUCT_CACHE:
+        return Product.objects.in_bulk(list(product_ids))
+
+    keys = {product_cache_key(pid): pid for pid in product_ids}
+    cached = cache.get_many(keys.keys())
+
+    products = {}
+    for key, value in cached.items():
+        if value != _MISSING:
+            products[keys[key]] = value
+
+    missing_ids = product_ids - {keys[key] for key in cached}
+    if missing_ids:
+        fetched = {p.id: p for p in Product.objects.filter(id__in=missing_ids)}
+        products.update(fetched)
+
+        cache.set_many(
+            {product_cache_key(pid): p for pid, p in fetched.items()},
+            PRODUCT_CACHE_TTL
+        )
+        absent = missing_ids - fetched.keys()
+        if absent:
+            cache.set_many(
+                {product_cache_key(pid): _MISSING for pid in absent},
+                MISSING_PRODUCT_TTL
+            )
+
+    return products
+
+
+def catalog_generation():
+    return cache.get(CATALOG_GENERATION_KEY, 0)
+
+
+def bump_catalog_generation():
+    try:
+        return cache.incr(CATALOG_GENERATION_KEY)
+    except ValueError:
+        # Key missing or evicted: start a fresh counter
+        cache.add(CATALOG_GENERATION_KEY, 1, None)
+        return catalog_generation()
+
+
+def invalidate_products(product_ids):
+    """
+    Drops cached entries after any stock/price/active write and marks
+    worker catalog snapshots as stale.
+    """
+    keys = [product_cache_key(pid) for pid in set(product_ids)]
+    if keys:
+        cache.delete_many(keys)
+        bump_catalog_generation()
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .models import Product
+from .product_cache import invalidate_products
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_SYNC_URL = getattr(settings, "PRODUCT_SYNC_URL", "https://dummyjson.com/products")
+PRODUCT_SYNC_PAGE_SIZE = getattr(settings, "PRODUCT_SYNC_PAGE_SIZE", 50)
+PRODUCT_SYNC_WORKERS = getattr(settings, "PRODUCT_SYNC_WORKERS", 8)
+PRODUCT_SYNC_CONNECT_TIMEOUT = getattr(settings, "PRODUCT_SYNC_CONNECT_TIMEOUT", 3.0)
+PRODUCT_SYNC_READ_TIMEOUT = getattr(settings, "PRODUCT_SYNC_READ_TIMEOUT", 10.0)
+PRODUCT_SYNC_CHUNK_SIZE = getattr(settings, "PRODUCT_SYNC_CHUNK_SIZE", 500)
+
+# Product columns owned by the upstream catalogue; everything else
+# (is_active, reserved) is local
+SYNC_FIELDS = ["title", "price_inr", "category", "stock"]
+
+# Upstream prices are USD
+INR_PER_USD = 80
+
+
+# ==================================================
+# UPSTREAM SOURCE
+# ==================================================
+
+class ProductSource:
+    """
+    Paged client for a dummyjson-style `GET <url>?limit=&skip=` endpoint
+    answering {"products": [...], "total": n}. One keep-alive pool shared
+    by up to `workers` threads, strict timeouts, and a couple of retries
+    for transient (5xx/429/connection) failures.
+    """
+
+    def __init__(self, url=PRODUCT_SYNC_URL, page_size=PRODUCT_SYNC_PAGE_SIZE, workers=PRODUCT_SYNC_WORKERS,
+                 connect_timeout=PRODUCT_SYNC_CONNECT_TIMEOUT, read_timeout=PRODUCT_SYNC_READ_TIMEOUT, retries=2):
+        self.url = url
+        self.page_size = page_size
+        self.workers = max(1, workers)
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.workers,
+            max_retries=Retry(
+                total=retries, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=["GET"], raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch_page(self, skip):
+        resp = self.session.get(
+            self.url,
+            params={"limit": self.page_size, "skip": skip, "select": "title,price,category,stock"},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    def pages(self, failures):
+        """
+        Yields each page's records as soon as it arrives. The first page
+        is fetched alone to learn `total`; the rest are fetched
+        concurrently. Pages that still fail after retries are appended to
+        `failures` as {skip, error}; a failing first page raises.
+        """
+        first = self.fetch_page(0)
+        yield first.get("products", [])
+
+        total = first.get("total", 0)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="product-sync") as pool:
+            futures = {
+                pool.submit(self.fetch_page, skip): skip
+                for skip in range(self.page_size, total, self.page_size)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield future.result().get("products", [])
+                except (requests.RequestException, ValueError) as e:
+                    logger.warning(f"[ProductSync] Page at skip={futures[future]} failed: {e}")
+                    failures.append({"skip": futures[future], "error": str(e)})
+
+    def close(self):
+        self.session.close()
+
+
+# ==================================================
+# CHANGE DETECTION + BULK UPSERT
+# ==================================================
+
+def product_fields(record):
+    """
+    Maps an upstream record onto Product columns; raises ValueError
+    (or KeyError/TypeError) for a record that cannot be stored.
+    """
+    title = str(record["title"]).strip()[:255]
+    if not title:
+        raise ValueError("empty title")
+    return {
+        "id": int(record["id"]),
+        "title": title,
+        "price_inr": round(float(record.get("price") or 0) * INR_PER_USD),
+        "category": str(record.get("category") or "")[:100],
+        "stock": max(0, int(record.get("stock", 10))),
+    }
+
+
+def sync_hash(fields):
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+class _Report:
+    def __init__(self):
+        self.fetched = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.invalid = 0
+
+
+def _write_chunk(records, report):
+    """
+    `records` is {id: fields}. Stored hashes for the chunk come back in one
+    query; only new or changed rows are upserted, in one statement.
+    """
+    stored = dict(Product.objects.filter(id__in=list(records)).values_list("id", "sync_hash"))
+
+    changed = []
+    for product_id, fields in records.items():
+        digest = sync_hash(fields)
+        if stored.get(product_id) == digest:
+            report.unchanged += 1
+            continue
+        if product_id in stored:
+            report.updated += 1
+        else:
+            report.created += 1
+        changed.append(Product(sync_hash=digest, **fields))
+
+    if not changed:
+        return
+
+    with transaction.atomic():
+        Product.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=SYNC_FIELDS + ["sync_hash"],
+        )
+    invalidate_products(p.id for p in changed)
+
+
+def sync_products(source=None, chunk_size=PRODUCT_SYNC_CHUNK_SIZE):
+    """
+    Pulls the upstream catalogue and writes only the products whose
+    upstream record changed since the last sync (or that are new). Local
+    edits such as sales or admin stock changes are therefore kept until
+    the upstream record itself changes.
+    Returns {fetched, created, updated, unchanged, invalid, failed_pages,
+    seconds}.
+    """
+    own_source = source is None
+    source = source or ProductSource()
+    started = time.perf_counter()
+    report = _Report()
+    failures = []
+    pending = {}
+
+    try:
+        # Threads only fetch; every database write happens on this thread
+        for records in source.pages(failures):
+            report.fetched += len(records)
+            for record in records:
+                try:
+                    fields = product_fields(record)
+                except (KeyError, TypeError, ValueError):
+                    report.invalid += 1
+                    continue
+                pending[fields["id"]] = fields
+
+            if len(pending) >= chunk_size:
+                _write_chunk(pending, report)
+                pending = {}
+
+        if pending:
+            _write_chunk(pending, report)
+    finally:
+        if own_source:
+            source.close()
+
+    return {
+        "fetched": report.fetched,
+        "created": report.created,
+        "updated": report.updated,
+        "unchanged": report.unchanged,
+        "invalid": report.invalid,
+        "failed_pages": failures,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,200 @@
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import Product, StockReservation
+from .utils import apply_stock_change, deduct_stock
+
+logger = logging.getLogger(__name__)
+
+# Stripe Checkout sessions cannot expire sooner than 30 minutes, so holds
+# are kept at least that long.
+RESERVATION_TTL = getattr(settings, "RESERVATION_TTL", 1800)
+
+# Stripe measures that minimum from its own creation time, so sessions ask
+# for TTL + margin (whole seconds, request latency); holds are created just
+# before the session and get the margin twice, so they outlive it.
+SESSION_EXPIRY_MARGIN = 60
+HOLD_TTL = RESERVATION_TTL + 2 * SESSION_EXPIRY_MARGIN
+
+
+def session_expires_at():
+    return int(time.time()) + RESERVATION_TTL + SESSION_EXPIRY_MARGIN
+
+
+# ==================================================
+# RESERVE (checkout)
+# ==================================================
+
+def reserve_stock(quantities, ttl=HOLD_TTL):
+    """
+    Holds {product_id: quantity} against available stock (stock - reserved)
+    with one conditional UPDATE on Product.reserved. Inactive products are
+    never held, whatever the caller's (possibly cached) view of them.
+    Returns (held {product_id: quantity}, [StockReservation]).
+    """
+    with transaction.atomic():
+        held = apply_stock_change(
+            quantities,
+            lambda qty: Q(is_active=True, stock__gte=F("reserved") + qty),
+            {"reserved": lambda qty: F("reserved") + qty},
+        )
+
+        expires_at = timezone.now() + datetime.timedelta(seconds=ttl)
+        reservations = StockReservation.objects.bulk_create([
+            StockReservation(product_id=pid, quantity=qty, expires_at=expires_at)
+            for pid, qty in held.items()
+        ])
+
+    return held, reservations
+
+
+def attach_reservations(reservations, snapshot):
+    StockReservation.objects.filter(
+        id__in=[r.id for r in reservations]
+    ).update(snapshot=snapshot)
+
+
+# ==================================================
+# RELEASE (abandoned / expired)
+# ==================================================
+
+def _give_back(quantities):
+    """
+    Returns held units to available stock (reserved -= qty, floored at 0).
+    """
+    if quantities:
+        Product.objects.filter(id__in=quantities.keys()).update(reserved=Case(
+            *[When(id=pid, then=Greatest(F("reserved") - qty, 0)) for pid, qty in quantities.items()],
+            default=F("reserved")
+        ))
+
+
+def _flip(reservations, status):
+    """
+    Moves the rows among `reservations` that are still active to `status`
+    and returns the ones this call moved, so each hold is released or
+    committed (and its quantity given back or deducted) exactly once, even
+    if the sweeper and the webhook race. Must run inside a transaction.
+    """
+    by_id = {r.id: r for r in reservations}
+    active = StockReservation.objects.filter(id__in=list(by_id), status=StockReservation.STATUS_ACTIVE)
+    if connection.features.has_select_for_update:
+        # Waits for a concurrent flip and re-checks the status after it
+        won = list(active.select_for_update().values_list("id", flat=True))
+        StockReservation.objects.filter(id__in=won).update(status=status)
+    else:
+        # No row locks (SQLite): the row count of a per-row conditional
+        # UPDATE tells exactly which rows this call won
+        won = [
+            rid for rid in by_id
+            if StockReservation.objects.filter(id=rid, status=StockReservation.STATUS_ACTIVE).update(status=status)
+        ]
+    return [by_id[rid] for rid in won]
+
+
+def _totals(reservations):
+    totals = {}
+    for r in reservations:
+        totals[r.product_id] = totals.get(r.product_id, 0) + r.quantity
+    return totals
+
+
+def _release_rows(reservations):
+    """
+    Returns the still-active rows among `reservations` to available stock;
+    rows another worker already released or committed are skipped.
+    """
+    released = _flip(reservations, StockReservation.STATUS_RELEASED)
+    if len(released) != len(reservations):
+        logger.info(f"[Reservations] {len(reservations) - len(released)} holds were already settled elsewhere")
+    _give_back(_totals(released))
+    return len(released)
+
+
+def _locked(queryset):
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    return queryset
+
+
+def release_expired(batch_size=500, now=None):
+    """
+    Releases one batch of expired holds; returns the number released.
+    Uses the (status, expires_at) index, never a table scan.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(_locked(
+            StockReservation.objects.filter(
+                status=StockReservation.STATUS_ACTIVE, expires_at__lte=now
+            ).order_by("expires_at").only("id", "product_id", "quantity")
+        )[:batch_size])
+        return _release_rows(expired)
+
+
+def release_for_snapshot(snapshot):
+    with transaction.atomic():
+        active = list(_locked(
+            snapshot.reservations.filter(status=StockReservation.STATUS_ACTIVE)
+        ))
+        return _release_rows(active)
+
+
+def release_reservations(reservations):
+    with transaction.atomic():
+        return _release_rows(reservations)
+
+
+# ==================================================
+# COMMIT (payment webhook)
+# ==================================================
+
+def commit_reservations(snapshot, requested):
+    """
+    Converts the snapshot's holds into real stock deductions
+    (stock -= qty, reserved -= qty) and deducts anything not covered by a
+    hold (e.g. it already expired) from unreserved stock.
+    Must run inside the order transaction.
+    Returns {product_id: deducted_quantity}.
+    """
+    active = list(_locked(
+        snapshot.reservations.filter(status=StockReservation.STATUS_ACTIVE)
+    ))
+    # Only holds this call moved to committed count; one the sweeper
+    # released meanwhile was already given back
+    held = _totals(_flip(active, StockReservation.STATUS_COMMITTED)) if active else {}
+
+    to_commit = {pid: min(qty, requested[pid]) for pid, qty in held.items() if pid in requested}
+    deducted = apply_stock_change(
+        to_commit,
+        lambda qty: Q(stock__gte=qty, reserved__gte=qty),
+        {
+            "stock": lambda qty: F("stock") - qty,
+            "reserved": lambda qty: F("reserved") - qty,
+        },
+        available=Least(F("stock"), F("reserved")),
+    )
+
+    # Held units the order did not consume go back to available stock
+    _give_back({
+        pid: qty - deducted.get(pid, 0)
+        for pid, qty in held.items()
+        if qty > deducted.get(pid, 0)
+    })
+
+    remainder = {
+        pid: qty - deducted.get(pid, 0)
+        for pid, qty in requested.items()
+        if pid not in held and qty > 0
+    }
+    for pid, qty in deduct_stock(remainder).items():
+        deducted[pid] = qty
+
+    return deducted
@@ -0,0 +1,155 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySales, Order, OrderItem
+
+# Dashboard windows in days (admin analytics)
+ANALYTICS_WINDOWS = getattr(settings, "ANALYTICS_WINDOWS", [7, 30, 90, 365])
+
+# ==================================================
+# SALES (normalised order lines)
+# ==================================================
+
+LINE_REVENUE = Sum(F("unit_price") * F("quantity"))
+
+
+def order_item_rows(order):
+    """
+    OrderItem rows mirroring order.items, for bulk_create next to the order.
+    """
+    return [
+        OrderItem(
+            order=order,
+            product_id=item["product_id"],
+            title=item["title"],
+            unit_price=item["price"],
+            quantity=item["quantity"],
+            created_at=order.created_at,
+        )
+        for item in order.items
+    ]
+
+
+def top_products(since=None, limit=10):
+    """
+    Best sellers by revenue as one GROUP BY over OrderItem; the time filter
+    uses the created_at index instead of scanning orders.
+    """
+    items = OrderItem.objects.all()
+    if since:
+        items = items.filter(created_at__gte=since)
+    return list(
+        items.values("product_id")
+        .annotate(title=Max("title"), units=Sum("quantity"), revenue=LINE_REVENUE)
+        .order_by("-revenue")[:limit]
+    )
+
+
+def category_revenue(since=None):
+    items = OrderItem.objects.all()
+    if since:
+        items = items.filter(created_at__gte=since)
+    return list(
+        items.values(category=F("product__category"))
+        .annotate(orders=Count("order_id", distinct=True), units=Sum("quantity"), revenue=LINE_REVENUE)
+        .order_by("-revenue")
+    )
+
+
+# ==================================================
+# DAILY ROLLUP
+# ==================================================
+
+def record_daily_sale(order):
+    """
+    Adds one order to its day's DailySales row. Must run inside the order
+    transaction. The row is inserted first (ignored if it exists) so the
+    increment is always a single UPDATE, even for concurrent webhooks.
+    """
+    day = timezone.localdate(order.created_at)
+    units = sum(item["quantity"] for item in order.items)
+
+    DailySales.objects.bulk_create([DailySales(date=day)], ignore_conflicts=True)
+    DailySales.objects.filter(date=day).update(
+        order_count=F("order_count") + 1,
+        revenue=F("revenue") + order.total,
+        units=F("units") + units,
+    )
+
+
+def rebuild_daily_sales(since=None):
+    """
+    Recomputes DailySales from Order/OrderItem (all history, or from the
+    date `since`) with two GROUP BY queries, replacing the rows in one
+    transaction. Returns the number of days written.
+    """
+    orders = Order.objects.all()
+    items = OrderItem.objects.all()
+    if since:
+        start = datetime.datetime.combine(since, datetime.time.min, tzinfo=timezone.get_current_timezone())
+        orders = orders.filter(created_at__gte=start)
+        items = items.filter(created_at__gte=start)
+
+    days = {
+        row["day"]: DailySales(date=row["day"], order_count=row["order_count"], revenue=row["revenue"] or 0)
+        for row in orders.annotate(day=TruncDate("created_at"))
+        .values("day").annotate(order_count=Count("id"), revenue=Sum("total"))
+    }
+    for row in items.annotate(day=TruncDate("created_at")).values("day").annotate(units=Sum("quantity")):
+        if row["day"] in days:
+            days[row["day"]].units = row["units"] or 0
+
+    with transaction.atomic():
+        stale = DailySales.objects.all()
+        if since:
+            stale = stale.filter(date__gte=since)
+        stale.delete()
+        DailySales.objects.bulk_create(days.values(), batch_size=1000)
+
+    return len(days)
+
+
+def sales_windows(today, windows=ANALYTICS_WINDOWS):
+    """
+    All-time totals plus per-window totals from the rollup in one query.
+    """
+    aggregates = {
+        "total_orders": Sum("order_count"),
+        "total_revenue": Sum("revenue"),
+    }
+    for days in windows:
+        recent = Q(date__gt=today - datetime.timedelta(days=days))
+        aggregates[f"orders_{days}"] = Sum("order_count", filter=recent)
+        aggregates[f"revenue_{days}"] = Sum("revenue", filter=recent)
+        aggregates[f"units_{days}"] = Sum("units", filter=recent)
+
+    row = DailySales.objects.aggregate(**aggregates)
+    return {
+        "total_orders": row["total_orders"] or 0,
+        "total_revenue": row["total_revenue"] or 0,
+        "windows": {
+            str(days): {
+                "orders": row[f"orders_{days}"] or 0,
+                "revenue": row[f"revenue_{days}"] or 0,
+                "units": row[f"units_{days}"] or 0,
+            }
+            for days in windows
+        },
+    }
+
+
+def daily_series(today, days):
+    """
+    Revenue per day for the last `days` days (oldest first, zero-filled).
+    """
+    start = today - datetime.timedelta(days=days - 1)
+    revenue = dict(DailySales.objects.filter(date__gte=start).values_list("date", "revenue"))
+    return [
+        {"date": day.strftime("%Y-%m-%d"), "revenue": revenue.get(day, 0)}
+        for day in (start + datetime.timedelta(days=i) for i in range(days))
+    ]
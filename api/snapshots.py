@@ -0,0 +1,65 @@
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CartSnapshot
+from .reservations import release_for_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Stripe retries webhook deliveries for up to 3 days; a snapshot older
+# than that can no longer turn into an order.
+CART_SNAPSHOT_TTL = getattr(settings, "CART_SNAPSHOT_TTL", 3 * 24 * 3600)
+
+
+# ==================================================
+# CART SNAPSHOT EXPIRY
+# ==================================================
+
+def expire_snapshot(session_id):
+    """
+    Reclaims the snapshot (and its stock holds) of a Stripe session that
+    expired unpaid. Returns True if a snapshot was removed.
+    """
+    snapshot = CartSnapshot.objects.filter(stripe_session_id=session_id).first()
+    if not snapshot:
+        return False
+
+    release_for_snapshot(snapshot)
+    snapshot.delete()
+    logger.info(f"CartSnapshot reclaimed for expired session_id={session_id}")
+    return True
+
+
+def purge_expired_snapshots(ttl=CART_SNAPSHOT_TTL, chunk_size=1000, pause=0.0, now=None):
+    """
+    Deletes snapshots older than ttl seconds in chunks of chunk_size, each
+    its own short statement over the created_at index, so no long-lived
+    locks are held. Returns the number of rows deleted.
+    """
+    cutoff = (now or timezone.now()) - datetime.timedelta(seconds=ttl)
+    deleted = 0
+
+    while True:
+        ids = list(
+            CartSnapshot.objects.filter(created_at__lt=cutoff)
+            .order_by("created_at")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+
+        # Any leftover holds are returned to stock by
+        # `manage.py release_reservations`; their snapshot link is cleared.
+        CartSnapshot.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+        if len(ids) < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return deleted
@@ -0,0 +1,229 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import httpx
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class StripeUnavailable(Exception):
+    """
+    Raised without calling Stripe while the circuit breaker is open.
+    """
+
+
+# ==================================================
+# CIRCUIT BREAKER
+# ==================================================
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures (errors or calls
+    slower than `slow_call_seconds`), rejects calls for `reset_timeout`
+    seconds, then lets a single trial call through (half-open).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, slow_call_seconds=5):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record(self, ok, elapsed):
+        with self._lock:
+            if ok and elapsed < self.slow_call_seconds:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"[Stripe] Circuit opened after {self.failures} failed/slow calls")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+# ==================================================
+# METRICS
+# ==================================================
+
+class CallMetrics:
+    """
+    In-process latency/error counters for outbound Stripe calls.
+    """
+
+    def __init__(self, window=500):
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed, ok):
+        ms = elapsed * 1000
+        with self._lock:
+            self.calls += 1
+            self.errors += 0 if ok else 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self.recent.append(ms)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            pick = lambda q: round(recent[min(len(recent) - 1, int(q * len(recent)))], 1) if recent else None
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+                "max_ms": round(self.max_ms, 1),
+                "p50_ms": pick(0.50),
+                "p95_ms": pick(0.95),
+            }
+
+
+# ==================================================
+# CLIENT
+# ==================================================
+
+# Errors that say Stripe itself is unhealthy; card/validation errors do not
+# count against the breaker.
+_OUTAGE_ERRORS = (stripe.APIConnectionError, stripe.RateLimitError, stripe.APIError)
+
+
+class StripeGateway:
+    """
+    Dedicated Stripe client: keep-alive connection pools (requests for sync
+    calls, httpx for async), strict connect/read timeouts, no hidden
+    retries, a circuit breaker and latency metrics.
+    """
+
+    def __init__(self, api_key, api_base=None, connect_timeout=3.0, read_timeout=10.0,
+                 pool_size=20, breaker=None):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        http_client = stripe.RequestsClient(
+            timeout=(connect_timeout, read_timeout),
+            session=session,
+            # One long-lived httpx.AsyncClient (keep-alive pool) for async views
+            async_fallback_client=stripe.HTTPXClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            ),
+        )
+
+        self.client = stripe.StripeClient(
+            api_key,
+            http_client=http_client,
+            max_network_retries=0,
+            base_addresses={"api": api_base} if api_base else {},
+        )
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = CallMetrics()
+
+    def _before(self):
+        if not self.breaker.allow():
+            self.metrics.reject()
+            raise StripeUnavailable("Stripe circuit is open")
+        return time.perf_counter()
+
+    def _after(self, started, ok):
+        elapsed = time.perf_counter() - started
+        self.metrics.observe(elapsed, ok)
+        self.breaker.record(ok, elapsed)
+        logger.info(f"[Stripe] call took {elapsed * 1000:.0f}ms ok={ok}")
+
+    def _call(self, func, *args, **kwargs):
+        started = self._before()
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        except _OUTAGE_ERRORS:
+            raise
+        except stripe.StripeError:
+            ok = True  # Stripe answered; the request itself was bad
+            raise
+        finally:
+            self._after(started, ok)
+
+    async def _acall(self, func, *args, **kwargs):
+        started = self._before()
+        ok = False
+        try:
+            result = await func(*args, **kwargs)
+            ok = True
+            return result
+        except _OUTAGE_ERRORS:
+            raise
+        except stripe.StripeError:
+            ok = True
+            raise
+        finally:
+            self._after(started, ok)
+
+    def create_checkout_session(self, params):
+        return self._call(self.client.checkout.sessions.create, params=params)
+
+    async def create_checkout_session_async(self, params):
+        return await self._acall(self.client.checkout.sessions.create_async, params=params)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_stripe_gateway():
+    """
+    Per-process gateway built from settings (one pool per worker).
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = StripeGateway(
+                    api_key=settings.STRIPE_SECRET_KEY or "",
+                    api_base=settings.STRIPE_API_BASE,
+                    connect_timeout=settings.STRIPE_CONNECT_TIMEOUT,
+                    read_timeout=settings.STRIPE_READ_TIMEOUT,
+                    pool_size=settings.STRIPE_POOL_SIZE,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.STRIPE_BREAKER_FAILURES,
+                        reset_timeout=settings.STRIPE_BREAKER_RESET,
+                        slow_call_seconds=settings.STRIPE_SLOW_CALL_SECONDS,
+                    ),
+                )
+    return _gateway
@@ -1,3 +1,1457 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import importlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+import threading
+from urllib.parse import parse_qs, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import stripe
+from django.apps import apps as django_apps
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import AsyncRequestFactory, TestCase as DjangoTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .activity import ActivityLogWriter, log_activity
+from .catalog import CatalogSnapshot, get_catalog, lookup_products, reset_catalog
+from .inventory_import import import_inventory
+from .invoice_export import orders_between, stream_invoice_zip
+from .invoice_template import ROWS_PER_PAGE, render_invoice_pdf
+from .invoices import ensure_invoice, get_invoice_storage, invoice_name, reset_invoice_storage
+from .log_archive import archive_logs, archive_path, stream_log_range
+from .models import ActivityLog, CartSnapshot, DailySales, Order, OrderItem, Product, Profile, StockReservation, WebhookEvent
+from .product_cache import get_products, invalidate_products
+from .product_sync import ProductSource, sync_products
+from .reservations import release_expired, release_reservations, reserve_stock
+from .snapshots import purge_expired_snapshots
+from .stripe_client import CircuitBreaker, StripeGateway, StripeUnavailable
+from .utils import deduct_stock, validate_cart
+from .views import async_views
+from .webhooks import process_event, process_pending
+
+User = get_user_model()
+
+
+# Activity entries are written synchronously, so tests read them back
+# inside their own transaction and no background writer thread starts
+@override_settings(ACTIVITY_LOG_BUFFERED=False)
+class TestCase(DjangoTestCase):
+    pass
+
+
+# ============================
+# Cart Validation
+# ============================
+
+class ValidateCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create([
+            Product(id=i, title=f"Product {i}", price_inr=100 * i, stock=5)
+            for i in range(1, 31)
+        ])
+        Product.objects.filter(id=2).update(is_active=False)
+        Product.objects.filter(id=3).update(stock=0)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+
+    def test_contract(self):
+        result = validate_cart([
+            {"product_id": 1, "quantity": 2},
+            {"product_id": 2, "quantity": 1},
+            {"product_id": 3, "quantity": 1},
+            {"product_id": 4, "quantity": 9},
+            {"product_id": 9999, "quantity": 1},
+            {"product_id": 5, "quantity": 0},
+            {"product_id": "bad", "quantity": 1},
+        ])
+
+        valid = {v["product"].id: v["quantity"] for v in result["valid_items"]}
+        reasons = {r["product_id"]: r["reason"] for r in result["removed_items"]}
+
+        self.assertEqual(valid, {1: 2, 4: 5})
+        self.assertEqual(reasons, {
+            2: "inactive",
+            3: "out_of_stock",
+            4: "quantity_adjusted",
+            9999: "deleted",
+            5: "invalid_quantity",
+        })
+
+    def test_single_query_for_large_cart(self):
+        items = [{"product_id": i, "quantity": 1} for i in range(1, 31)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            validate_cart(items)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            validate_cart(items, lock=True)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+# ============================
+# Product Cache
+# ============================
+
+@override_settings(PRODUCT_CACHE=True)
+class ProductCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(id=1, title="Cached", price_inr=100, stock=5)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+
+    def test_steady_state_served_from_cache(self):
+        items = [{"product_id": 1, "quantity": 1}, {"product_id": 404, "quantity": 1}]
+        validate_cart(items)
+
+        with self.assertNumQueries(0):
+            result = validate_cart(items)
+        self.assertEqual(result["valid_items"][0]["product"].title, "Cached")
+        self.assertEqual(result["removed_items"][0]["reason"], "deleted")
+
+    def test_invalidation_after_write(self):
+        get_products([1])
+        Product.objects.filter(id=1).update(stock=0)
+        self.assertEqual(get_products([1])[1].stock, 5)
+
+        invalidate_products([1])
+        self.assertEqual(get_products([1])[1].stock, 0)
+
+    @override_settings(PRODUCT_CACHE=False)
+    def test_disabled_without_shared_cache(self):
+        get_products([1])
+        Product.objects.filter(id=1).update(stock=0)
+        self.assertEqual(get_products([1])[1].stock, 0)
+
+
+# ============================
+# Catalog Snapshot
+# ============================
+
+@override_settings(CATALOG_SNAPSHOT=True)
+class CatalogSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+
+    def test_dense_and_sparse_lookup(self):
+        rows = [(1, "One", 100, 3, True, "a"), (2, "Two", 200, 0, False, "b")]
+        dense = CatalogSnapshot.from_rows(rows)
+        sparse = CatalogSnapshot.from_rows(rows + [(10 ** 9, "Far", 1, 1, True, "a")])
+
+        for snapshot in (dense, sparse):
+            self.assertEqual(snapshot.get(2).title, "Two")
+            self.assertFalse(snapshot.get(2).is_active)
+            self.assertIsNone(snapshot.get(3))
+        self.assertEqual(sparse.get(10 ** 9).category, "a")
+
+    @mock.patch("api.catalog.CATALOG_CHECK_INTERVAL", 0)
+    def test_refresh_on_generation_change(self):
+        Product.objects.create(id=1, title="Old", price_inr=100, stock=5)
+        snapshot = get_catalog()
+        self.assertIs(get_catalog(), snapshot)
+
+        Product.objects.filter(id=1).update(title="New")
+        self.assertEqual(get_catalog().get(1).title, "Old")
+
+        invalidate_products([1])
+        self.assertEqual(get_catalog().get(1).title, "New")
+
+    @mock.patch("api.catalog.CATALOG_CHECK_INTERVAL", 0)
+    def test_rebuilds_after_max_age_without_invalidation(self):
+        Product.objects.create(id=1, title="Old", price_inr=100, stock=5)
+        get_catalog()
+        Product.objects.filter(id=1).update(title="New")
+
+        with mock.patch("api.catalog.CATALOG_MAX_AGE", 0):
+            self.assertEqual(get_catalog().get(1).title, "New")
+
+    @override_settings(CATALOG_SNAPSHOT=False)
+    def test_disabled_without_shared_cache(self):
+        Product.objects.create(id=1, title="Old", price_inr=100, stock=5)
+        get_catalog()
+        Product.objects.filter(id=1).update(title="New")
+
+        self.assertEqual(lookup_products([1])[1].title, "New")
+        self.assertEqual(get_catalog().get(1).title, "New")
+
+
+# ============================
+# Stock Deduction
+# ============================
+
+class DeductStockTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(id=1, title="A", price_inr=100, stock=5)
+        Product.objects.create(id=2, title="B", price_inr=100, stock=1)
+
+    def test_single_conditional_update(self):
+        with self.assertNumQueries(3):  # savepoint + UPDATE + release
+            self.assertEqual(deduct_stock({1: 2, 2: 1}), {1: 2, 2: 1})
+        self.assertEqual(Product.objects.get(id=1).stock, 3)
+        self.assertEqual(Product.objects.get(id=2).stock, 0)
+
+    def test_partial_failure_falls_back_per_line(self):
+        self.assertEqual(deduct_stock({1: 2, 2: 3}), {1: 2, 2: 1})
+        self.assertEqual(Product.objects.get(id=1).stock, 3)
+        self.assertEqual(Product.objects.get(id=2).stock, 0)
+
+    def test_negative_stock_rejected_by_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Product.objects.filter(id=2).update(stock=-1)
+
+
+# ============================
+# Stripe Webhook
+# ============================
+
+def checkout_completed_event(session_id, user_id, event_id="evt_1"):
+    return {
+        "id": event_id,
+        "type": "checkout.session.completed",
+        "data": {"object": {"id": session_id, "metadata": {"user_id": str(user_id)}}},
+    }
+
+
+class StripeWebhookTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Product.objects.create(id=1, title="A", price_inr=100, stock=5)
+        Product.objects.create(id=2, title="B", price_inr=50, stock=1)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+
+    def post_event(self, event):
+        with mock.patch("stripe.Webhook.construct_event", return_value=event):
+            return self.client.post(
+                "/api/stripe/webhook/", data=json.dumps(event), content_type="application/json",
+                HTTP_STRIPE_SIGNATURE="sig"
+            )
+
+    def test_view_only_enqueues(self):
+        event = checkout_completed_event("cs_1", self.user.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.post_event(event).status_code, 200)
+        self.post_event(event)  # Stripe retry
+
+        inbox = WebhookEvent.objects.get()
+        self.assertEqual(inbox.status, WebhookEvent.STATUS_PENDING)
+        self.assertFalse(Order.objects.exists())
+
+    def test_duplicate_session_rejected_by_ledger(self):
+        CartSnapshot.objects.create(stripe_session_id="cs_1", items=[{"product_id": 1, "quantity": 1}])
+        process_event(checkout_completed_event("cs_1", self.user.id, event_id="evt_1"))
+
+        with self.assertNumQueries(4):  # savepoint + conflicting INSERT + rollback + release
+            process_event(checkout_completed_event("cs_1", self.user.id, event_id="evt_2"))
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Product.objects.get(id=1).stock, 4)
+
+    @override_settings(CATALOG_SNAPSHOT=True)
+    def test_paid_order_ignores_stale_worker_snapshot(self):
+        CartSnapshot.objects.create(
+            stripe_session_id="cs_1",
+            items=[{"product_id": 1, "quantity": 1, "price_inr": 90}, {"product_id": 2, "quantity": 2, "price_inr": 50}]
+        )
+        get_catalog()
+        # Changed behind this worker's snapshot, without an invalidation
+        Product.objects.filter(id=1).update(price_inr=120)
+        Product.objects.filter(id=2).update(stock=3)
+
+        process_event(checkout_completed_event("cs_1", self.user.id))
+
+        order = Order.objects.get(stripe_session_id="cs_1")
+        self.assertEqual([(i["product_id"], i["price"], i["quantity"]) for i in order.items], [(1, 90, 1), (2, 50, 2)])
+        self.assertEqual(order.total, 190)
+
+    def test_missing_snapshot_is_rejected(self):
+        self.post_event(checkout_completed_event("cs_missing", self.user.id))
+        self.assertEqual(process_pending(concurrency=1), [WebhookEvent.STATUS_FAILED])
+        self.assertEqual(process_pending(concurrency=1), [])
+
+    @mock.patch("api.webhooks.WEBHOOK_MAX_ATTEMPTS", 2)
+    def test_errors_back_off_then_alert(self):
+        self.post_event(checkout_completed_event("cs_1", self.user.id))
+
+        with mock.patch("api.webhooks.process_event", side_effect=RuntimeError("boom")):
+            self.assertEqual(process_pending(concurrency=1), [WebhookEvent.STATUS_PENDING])
+            # Not claimable again until its backoff has passed
+            self.assertEqual(process_pending(concurrency=1), [])
+            inbox = WebhookEvent.objects.get()
+            self.assertGreater(inbox.next_attempt_at, timezone.now())
+
+            WebhookEvent.objects.update(next_attempt_at=timezone.now())
+            with self.assertLogs("api.webhooks", "CRITICAL") as logs:
+                self.assertEqual(process_pending(concurrency=1), [WebhookEvent.STATUS_FAILED])
+        self.assertIn("webhook_exhausted", logs.output[0])
+        self.assertEqual(WebhookEvent.objects.get().attempts, 2)
+
+    def test_creates_order_and_trims_to_stock(self):
+        CartSnapshot.objects.create(
+            stripe_session_id="cs_1",
+            items=[{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1}]
+        )
+        get_catalog()
+        Product.objects.filter(id=2).update(stock=0)  # sold out after the snapshot was built
+
+        response = self.post_event(checkout_completed_event("cs_1", self.user.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(process_pending(concurrency=1), [WebhookEvent.STATUS_DONE])
+
+        order = Order.objects.get(stripe_session_id="cs_1")
+        self.assertEqual(order.total, 200)
+        self.assertEqual([i["product_id"] for i in order.items], [1])
+        self.assertEqual(Product.objects.get(id=1).stock, 3)
+        self.assertFalse(CartSnapshot.objects.filter(stripe_session_id="cs_1").exists())
+        self.assertTrue(ActivityLog.objects.filter(action=f"Payment Success - Order #{order.id}").exists())
+
+
+# ============================
+# Stock Reservations
+# ============================
+
+class StockReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Product.objects.create(id=1, title="A", price_inr=100, stock=3)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, session_id, quantity):
+        gateway = mock.Mock()
+        gateway.create_checkout_session.return_value = mock.Mock(id=session_id, url=f"https://stripe.test/{session_id}")
+        with mock.patch("api.views.payments.get_stripe_gateway", return_value=gateway):
+            response = self.client.post(
+                "/api/create-checkout-session/", {"items": [{"id": 1, "qty": quantity}]}, format="json"
+            )
+        return response, gateway.create_checkout_session
+
+    def test_checkout_reserves_and_trims(self):
+        self.checkout("cs_1", 2)
+        response, create = self.checkout("cs_2", 2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(create.call_args.args[0]["line_items"][0]["quantity"], 1)
+        self.assertEqual(Product.objects.get(id=1).reserved, 3)
+        self.assertEqual(
+            CartSnapshot.objects.get(stripe_session_id="cs_2").items, [{"product_id": 1, "quantity": 1, "price_inr": 100}]
+        )
+
+        response, create = self.checkout("cs_3", 1)
+        self.assertEqual(response.status_code, 400)
+        create.assert_not_called()
+
+    def test_inactive_product_is_not_reserved(self):
+        Product.objects.filter(id=1).update(is_active=False)
+        held, reservations = reserve_stock({1: 1})
+
+        self.assertEqual((held, reservations), ({}, []))
+        self.assertEqual(Product.objects.get(id=1).reserved, 0)
+
+    def test_session_and_hold_expiry_clear_stripe_minimum(self):
+        _, create = self.checkout("cs_1", 1)
+
+        expires_at = create.call_args.args[0]["expires_at"]
+        self.assertGreaterEqual(expires_at - timezone.now().timestamp(), 30 * 60 + 30)
+        self.assertGreaterEqual(StockReservation.objects.get().expires_at.timestamp(), expires_at)
+
+    def test_webhook_commits_reservation(self):
+        self.checkout("cs_1", 2)
+        process_event(checkout_completed_event("cs_1", self.user.id))
+
+        product = Product.objects.get(id=1)
+        self.assertEqual((product.stock, product.reserved), (1, 0))
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.STATUS_COMMITTED)
+
+    def test_session_expired_event_reclaims_snapshot(self):
+        self.checkout("cs_1", 2)
+        process_event({"id": "evt_x", "type": "checkout.session.expired", "data": {"object": {"id": "cs_1"}}})
+
+        self.assertFalse(CartSnapshot.objects.exists())
+        self.assertEqual(Product.objects.get(id=1).reserved, 0)
+
+    def test_sweeper_releases_expired_holds(self):
+        self.checkout("cs_1", 2)
+        self.assertEqual(release_expired(), 0)
+
+        later = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(release_expired(now=later), 1)
+        self.assertEqual(Product.objects.get(id=1).reserved, 0)
+
+        # A late payment still succeeds from unreserved stock
+        process_event(checkout_completed_event("cs_1", self.user.id))
+        self.assertEqual(Product.objects.get(id=1).stock, 1)
+
+    def test_partially_settled_release_gives_back_the_rest(self):
+        Product.objects.create(id=2, title="B", price_inr=100, stock=5)
+        _, holds = reserve_stock({1: 2, 2: 3})
+
+        # Another worker released the first hold already
+        self.assertEqual(release_reservations(holds[:1]), 1)
+        self.assertEqual(release_reservations(holds), 1)
+
+        self.assertEqual(dict(Product.objects.values_list("id", "reserved")), {1: 0, 2: 0})
+        self.assertEqual(
+            set(StockReservation.objects.values_list("status", flat=True)), {StockReservation.STATUS_RELEASED}
+        )
+
+
+# ============================
+# Async Views
+# ============================
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Order.objects.create(user=cls.user, items=[], total=100, stripe_session_id="cs_old")
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.auth = {"headers": {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}}
+
+    async def test_requires_valid_token(self):
+        response = await async_views.me(self.factory.get("/api/me/"))
+        self.assertEqual(response.status_code, 401)
+
+        response = await async_views.me(self.factory.get("/api/me/", headers={"Authorization": "Bearer nope"}))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_read_endpoints(self):
+        response = await async_views.me(self.factory.get("/api/me/", **self.auth))
+        self.assertEqual(json.loads(response.content)["username"], "buyer")
+
+        response = await async_views.my_orders(self.factory.get("/api/orders/", **self.auth))
+        self.assertEqual([o["stripe_session_id"] for o in json.loads(response.content)], ["cs_old"])
+
+    async def test_address_round_trip(self):
+        fields = {"full_name": "B", "phone": "1", "street": "S", "city": "C", "state": "St", "pincode": "1"}
+        request = self.factory.post("/api/address/", data=fields, content_type="application/json", **self.auth)
+        self.assertEqual((await async_views.address_view(request)).status_code, 201)
+
+        response = await async_views.address_view(self.factory.get("/api/address/", **self.auth))
+        self.assertEqual(json.loads(response.content)["city"], "C")
+
+    async def test_webhook_enqueues(self):
+        event = checkout_completed_event("cs_1", self.user.id)
+        request = self.factory.post(
+            "/api/stripe/webhook/", data=json.dumps(event), content_type="application/json",
+            headers={"Stripe-Signature": "sig"}
+        )
+        with mock.patch("stripe.Webhook.construct_event", return_value=event):
+            response = await async_views.stripe_webhook(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(await WebhookEvent.objects.filter(event_id="evt_1").aexists())
+
+
+# ============================
+# Stripe Client (local stub server)
+# ============================
+
+class StubStripeHandler(BaseHTTPRequestHandler):
+    status = 200
+    requests_seen = 0
+
+    def do_POST(self):
+        type(self).requests_seen += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(
+            {"id": "cs_stub", "object": "checkout.session", "url": "https://stripe.test/cs_stub"}
+            if self.status == 200 else {"error": {"type": "api_error", "message": "down"}}
+        ).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StripeGatewayTests(TestCase):
+
+    def setUp(self):
+        StubStripeHandler.status = 200
+        StubStripeHandler.requests_seen = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubStripeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.gateway = StripeGateway(
+            api_key="sk_test_stub",
+            api_base=f"http://127.0.0.1:{self.server.server_port}",
+            connect_timeout=1, read_timeout=2,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+
+    def test_creates_session_and_records_latency(self):
+        session = self.gateway.create_checkout_session({"mode": "payment"})
+        self.assertEqual(session.id, "cs_stub")
+        self.assertEqual(self.gateway.metrics.snapshot()["calls"], 1)
+
+    def test_breaker_fails_fast_after_outage(self):
+        StubStripeHandler.status = 500
+        for _ in range(2):
+            with self.assertRaises(stripe.APIError):
+                self.gateway.create_checkout_session({"mode": "payment"})
+
+        with self.assertRaises(StripeUnavailable):
+            self.gateway.create_checkout_session({"mode": "payment"})
+        self.assertEqual(StubStripeHandler.requests_seen, 2)
+        self.assertEqual(self.gateway.metrics.snapshot()["rejected"], 1)
+
+    def test_checkout_returns_503_and_releases_hold(self):
+        user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Product.objects.create(id=1, title="A", price_inr=100, stock=3)
+        self.gateway.breaker.record(False, 0)
+        self.gateway.breaker.record(False, 0)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        with mock.patch("api.views.payments.get_stripe_gateway", return_value=self.gateway):
+            response = client.post("/api/create-checkout-session/", {"items": [{"id": 1, "qty": 1}]}, format="json")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(Product.objects.get(id=1).reserved, 0)
+
+
+    async def test_async_session_uses_pooled_client(self):
+        session = await self.gateway.create_checkout_session_async({"mode": "payment"})
+
+        self.assertEqual(session.id, "cs_stub")
+        self.assertEqual(StubStripeHandler.requests_seen, 1)
+        self.assertEqual(self.gateway.metrics.snapshot()["calls"], 1)
+
+    async def async_checkout(self, user):
+        request = AsyncRequestFactory().post(
+            "/api/create-checkout-session/", data={"items": [{"id": 1, "qty": 2}]}, content_type="application/json",
+            headers={"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"},
+        )
+        with mock.patch("api.views.async_views.get_stripe_gateway", return_value=self.gateway):
+            return await async_views.create_checkout_session(request)
+
+    async def test_async_checkout_reserves_then_finalizes(self):
+        user = await User.objects.acreate(username="buyer", email="buyer@example.com")
+        await Product.objects.acreate(id=1, title="A", price_inr=100, stock=3)
+
+        response = await self.async_checkout(user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["url"], "https://stripe.test/cs_stub")
+        snapshot = await CartSnapshot.objects.aget(stripe_session_id="cs_stub")
+        self.assertEqual(snapshot.items, [{"product_id": 1, "quantity": 2, "price_inr": 100}])
+        self.assertEqual((await Product.objects.aget(id=1)).reserved, 2)
+        self.assertEqual(await StockReservation.objects.filter(snapshot=snapshot).acount(), 1)
+
+    async def test_async_checkout_returns_503_and_releases_hold(self):
+        user = await User.objects.acreate(username="buyer", email="buyer@example.com")
+        await Product.objects.acreate(id=1, title="A", price_inr=100, stock=3)
+        StubStripeHandler.status = 500
+
+        response = await self.async_checkout(user)  # Stripe errors: hold released, 500
+        self.assertEqual(response.status_code, 500)
+        await self.async_checkout(user)
+
+        response = await self.async_checkout(user)  # breaker open: no Stripe call
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(StubStripeHandler.requests_seen, 2)
+        self.assertEqual((await Product.objects.aget(id=1)).reserved, 0)
+        self.assertFalse(await CartSnapshot.objects.aexists())
+
+
+# ============================
+# Cart Snapshot Purge
+# ============================
+
+class PurgeSnapshotTests(TestCase):
+
+    def test_purges_only_expired_in_chunks(self):
+        CartSnapshot.objects.bulk_create([
+            CartSnapshot(stripe_session_id=f"cs_{i}", items=[]) for i in range(5)
+        ])
+        old = timezone.now() - datetime.timedelta(days=4)
+        CartSnapshot.objects.exclude(stripe_session_id="cs_4").update(created_at=old)
+
+        self.assertEqual(purge_expired_snapshots(chunk_size=2), 4)
+        self.assertEqual(list(CartSnapshot.objects.values_list("stripe_session_id", flat=True)), ["cs_4"])
+
+
+# ============================
+# Orders Pagination
+# ============================
+
+class MyOrdersPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Order.objects.bulk_create([
+            Order(user=cls.user, items=[], total=i, stripe_session_id=f"cs_{i}") for i in range(5)
+        ])
+        # Two orders share a timestamp to exercise the id tie-breaker
+        same = timezone.now()
+        Order.objects.filter(total__in=[1, 2]).update(created_at=same)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_walks_every_order_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"after": cursor} if cursor else {})}
+            response = self.client.get("/api/orders/", params)
+            seen += [o["id"] for o in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        expected = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_offset_still_supported_and_bad_cursor_rejected(self):
+        response = self.client.get("/api/orders/", {"limit": 2, "offset": 4})
+        self.assertEqual(len(response.json()), 1)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+        self.assertEqual(self.client.get("/api/orders/", {"after": "garbage"}).status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        cls.order = Order.objects.create(user=cls.user, items=[], total=100, stripe_session_id="cs_1")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, headers={"If-None-Match": response.headers["ETag"]})
+
+    def test_orders_not_modified_until_a_new_order(self):
+        first = self.client.get("/api/orders/", {"limit": 5})
+        self.assertIn("ETag", first.headers)
+        self.assertIn("Last-Modified", first.headers)
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.revalidate("/api/orders/", first, limit=5)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        # Another page is another representation
+        self.assertEqual(self.revalidate("/api/orders/", first, limit=1).status_code, 200)
+
+        Order.objects.create(user=self.user, items=[], total=50, stripe_session_id="cs_2")
+        self.assertEqual(self.revalidate("/api/orders/", first, limit=5).status_code, 200)
+
+    def test_order_detail_validators_and_missing_order(self):
+        url = f"/api/orders/{self.order.id}/"
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        self.assertEqual(self.client.get("/api/orders/999999/").status_code, 404)
+
+    def test_me_and_address_change_etag_on_write(self):
+        me = self.client.get("/api/me/")
+        self.assertEqual(self.revalidate("/api/me/", me).status_code, 304)
+        self.client.patch("/api/profile/", {"theme": "dark"}, format="json")
+        self.assertEqual(self.revalidate("/api/me/", me).status_code, 200)
+
+        empty = self.client.get("/api/address/")
+        self.assertEqual(self.revalidate("/api/address/", empty).status_code, 304)
+        self.client.post("/api/address/", {
+            "full_name": "A", "phone": "1", "street": "S", "city": "C", "state": "ST", "pincode": "1",
+        }, format="json")
+        self.assertEqual(self.revalidate("/api/address/", empty).status_code, 200)
+
+
+def use_temp_invoice_storage(test):
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    override = override_settings(INVOICE_STORAGE_OPTIONS={"location": tmp.name})
+    override.enable()
+    test.addCleanup(override.disable)
+    reset_invoice_storage()
+    test.addCleanup(reset_invoice_storage)
+    return tmp.name
+
+
+class InvoiceCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Product.objects.create(id=1, title="A", price_inr=100, stock=5)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+        use_temp_invoice_storage(self)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_webhook_prerenders_and_download_streams_cached_file(self):
+        CartSnapshot.objects.create(stripe_session_id="cs_1", items=[{"product_id": 1, "quantity": 1}])
+        with self.captureOnCommitCallbacks(execute=True):
+            process_event(checkout_completed_event("cs_1", self.user.id))
+        order = Order.objects.select_related("user").get()
+        self.assertTrue(get_invoice_storage().exists(invoice_name(order)))
+
+        with mock.patch("api.invoices.render_invoice") as render:
+            response = self.client.get(f"/api/orders/{order.id}/invoice/")
+            body = b"".join(response.streaming_content)
+        render.assert_not_called()
+        self.assertTrue(body.startswith(b"%PDF"))
+        self.assertIn("private", response.headers["Cache-Control"])
+
+        again = self.client.get(
+            f"/api/orders/{order.id}/invoice/", headers={"If-None-Match": response.headers["ETag"]}
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_renders_on_first_download_and_rerenders_when_details_change(self):
+        order = Order.objects.create(user=self.user, items=[], total=100, stripe_session_id="cs_1")
+        first = self.client.get(f"/api/orders/{order.id}/invoice/")
+        self.assertEqual(first.status_code, 200)
+        first.close()
+
+        self.user.email = "new@example.com"
+        self.user.save()
+        second = self.client.get(f"/api/orders/{order.id}/invoice/")
+        second.close()
+        self.assertNotEqual(first.headers["ETag"], second.headers["ETag"])
+        self.assertEqual(len(get_invoice_storage().listdir("v2")[1]), 2)
+
+    def test_large_orders_paginate_over_one_shared_layout(self):
+        items = [
+            {"product_id": i, "title": f"Product {i}", "price": 10, "quantity": 1}
+            for i in range(ROWS_PER_PAGE * 2 + 1)
+        ]
+        order = Order.objects.create(user=self.user, items=items, total=10 * len(items), stripe_session_id="cs_1")
+
+        pdf = render_invoice_pdf(Order.objects.select_related("user").get(id=order.id))
+        self.assertEqual(pdf.count(b"/Type /Page\n"), 3)
+        self.assertEqual(pdf.count(b"/Subtype /Form"), 1)
+
+
+class InvoiceExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        cls.orders = Order.objects.bulk_create([
+            Order(user=cls.user, items=[{"title": "A", "price": 10, "quantity": i}], total=10 * i,
+                  stripe_session_id=f"cs_{i}")
+            for i in range(1, 4)
+        ])
+        Order.objects.filter(id=cls.orders[2].id).update(
+            created_at=timezone.now() - datetime.timedelta(days=40)
+        )
+
+    def setUp(self):
+        self.tmp = use_temp_invoice_storage(self)
+        self.client = APIClient()
+
+    def test_admin_endpoint_streams_range_and_reuses_cache(self):
+        ensure_invoice(Order.objects.select_related("user").get(id=self.orders[0].id))
+        today = timezone.localdate()
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/admin/invoices/export/").status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get("/api/admin/invoices/export/", {"from": "bad"}).status_code, 400)
+
+        with mock.patch("api.invoice_export.INVOICE_EXPORT_WORKERS", 0):
+            response = self.client.get(
+                "/api/admin/invoices/export/", {"from": str(today - datetime.timedelta(days=1)), "to": str(today)}
+            )
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(f"invoice_{o.id}.pdf" for o in self.orders[:2]),
+        )
+        self.assertTrue(archive.read(f"invoice_{self.orders[1].id}.pdf").startswith(b"%PDF"))
+        # Freshly rendered invoices land in the cache too
+        self.assertEqual(len(get_invoice_storage().listdir("v2")[1]), 2)
+
+    def test_orders_of_deleted_users_are_exported(self):
+        ghost = User.objects.create_user(username="ghost", email="ghost@example.com", password="x")
+        orphan = Order.objects.create(user=ghost, items=[{"title": "B", "price": 5, "quantity": 1}], total=5)
+        ghost.delete()
+
+        today = timezone.localdate()
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(
+            stream_invoice_zip(orders_between(today, today), workers=0)
+        )))
+
+        self.assertIn(f"invoice_{orphan.id}.pdf", archive.namelist())
+        self.assertNotIn("FAILED.txt", archive.namelist())
+        self.assertTrue(archive.read(f"invoice_{orphan.id}.pdf").startswith(b"%PDF"))
+
+    def test_command_renders_in_process_pool(self):
+        output = os.path.join(self.tmp, "export.zip")
+        start = timezone.localdate() - datetime.timedelta(days=60)
+        call_command(
+            "export_invoices", "--from", str(start), "--to", str(timezone.localdate()),
+            "--output", output, "--workers", "2", stdout=io.StringIO(),
+        )
+
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+            self.assertIsNone(archive.testzip())
+
+
+class OrderItemTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Product.objects.create(id=1, title="Phone", price_inr=100, stock=5, category="smartphones")
+        Product.objects.create(id=2, title="Lamp", price_inr=50, stock=5, category="furniture")
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+
+    def test_webhook_writes_order_items(self):
+        CartSnapshot.objects.create(stripe_session_id="cs_1", items=[
+            {"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1},
+        ])
+        process_event(checkout_completed_event("cs_1", self.user.id))
+
+        order = Order.objects.get()
+        self.assertEqual(
+            sorted(order.order_items.values_list("product_id", "unit_price", "quantity", "created_at")),
+            [(1, 100, 2, order.created_at), (2, 50, 1, order.created_at)],
+        )
+
+    def test_backfill_and_sql_breakdown(self):
+        Order.objects.bulk_create([
+            Order(user=self.user, total=350, stripe_session_id="cs_1", items=[
+                {"product_id": 1, "title": "Phone", "price": 100, "quantity": 3},
+                {"product_id": 2, "title": "Lamp", "price": 50, "quantity": 1},
+            ]),
+            Order(user=self.user, total=150, stripe_session_id="cs_2", items=[
+                {"product_id": 2, "title": "Lamp", "price": 50, "quantity": 3},
+            ]),
+        ])
+        migration = importlib.import_module("api.migrations.0020_backfill_order_items")
+        migration.backfill_order_items(django_apps, None)
+        migration.backfill_order_items(django_apps, None)  # re-run is a no-op
+        self.assertEqual(OrderItem.objects.count(), 3)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertNumQueries(2):
+            data = client.get("/api/admin/analytics/sales/", {"days": 7}).json()
+
+        self.assertEqual(
+            [(p["product_id"], p["units"], p["revenue"]) for p in data["top_products"]],
+            [(1, 3, 300), (2, 4, 200)],
+        )
+        self.assertEqual(
+            {c["category"]: (c["orders"], c["revenue"]) for c in data["categories"]},
+            {"smartphones": (1, 300), "furniture": (2, 200)},
+        )
+
+
+class DailySalesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        Product.objects.create(id=1, title="Phone", price_inr=100, stock=10)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def pay(self, session_id, quantity):
+        CartSnapshot.objects.create(stripe_session_id=session_id, items=[{"product_id": 1, "quantity": quantity}])
+        process_event(checkout_completed_event(session_id, self.user.id, event_id=f"evt_{session_id}"))
+
+    def test_webhook_increments_rollup_and_rebuild_matches(self):
+        self.pay("cs_1", 2)
+        self.pay("cs_2", 1)
+
+        row = DailySales.objects.get()
+        self.assertEqual((row.order_count, row.revenue, row.units), (2, 300, 3))
+
+        # Orders older than the rollup (e.g. before deploy) are picked up by a rebuild
+        old = Order.objects.create(user=self.user, total=70, stripe_session_id="cs_old", items=[])
+        Order.objects.filter(id=old.id).update(created_at=timezone.now() - datetime.timedelta(days=40))
+        call_command("rebuild_daily_sales", stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(DailySales.objects.values_list("order_count", "revenue", "units")),
+            [(1, 70, 0), (2, 300, 3)],
+        )
+
+    def test_analytics_reads_rollup(self):
+        today = timezone.localdate()
+        DailySales.objects.bulk_create([
+            DailySales(date=today, order_count=2, revenue=300, units=3),
+            DailySales(date=today - datetime.timedelta(days=20), order_count=1, revenue=70, units=1),
+        ])
+
+        with self.assertNumQueries(3):  # users, window totals, daily series
+            data = self.client.get("/api/admin/analytics/").json()
+
+        self.assertEqual((data["total_orders"], data["total_revenue"]), (3, 370))
+        self.assertEqual(data["windows"]["7"], {"orders": 2, "revenue": 300, "units": 3})
+        self.assertEqual(data["windows"]["30"]["revenue"], 370)
+        self.assertEqual(len(data["daily_sales"]), 7)
+        self.assertEqual(data["daily_sales"][-1], {"date": str(today), "revenue": 300})
+
+        self.assertEqual(len(self.client.get("/api/admin/analytics/", {"days": 30}).json()["daily_sales"]), 30)
+        self.assertEqual(self.client.get("/api/admin/analytics/", {"days": 5}).status_code, 400)
+
+
+class AdminUserListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        cls.users = [
+            User.objects.create_user(username=f"user{i}", email=f"u{i}@example.com", password="x")
+            for i in range(5)
+        ]
+        Profile.objects.create(user=cls.users[0], status="blocked")
+        User.objects.filter(id=cls.users[0].id).update(is_active=False)
+        User.objects.create_user(username="Zed", email="zed@example.com", password="x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_keyset_pages_create_missing_profiles_in_bulk(self):
+        with self.assertNumQueries(3):  # joined page + one profile INSERT + re-read
+            self.client.get("/api/admin/users/", {"limit": 3})
+        with self.assertNumQueries(1):
+            self.client.get("/api/admin/users/", {"limit": 3})
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"after": cursor} if cursor else {})}
+            response = self.client.get("/api/admin/users/", params)
+            seen += [u["id"] for u in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        self.assertEqual(seen, sorted(User.objects.values_list("id", flat=True), reverse=True))
+        self.assertEqual(Profile.objects.count(), User.objects.count())
+
+    def test_filters_and_prefix_search(self):
+        get = lambda **params: [u["username"] for u in self.client.get("/api/admin/users/", params).json()]
+
+        self.assertEqual(get(status="blocked"), ["user0"])
+        self.assertEqual(get(is_active="false"), ["user0"])
+        self.assertNotIn("user0", get(status="active"))
+        self.assertEqual(get(q="zE"), ["Zed"])
+        self.assertEqual(get(q="u3@"), ["user3"])
+
+    def test_prefix_search_uses_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan format is vendor specific")
+        plan = User.objects.filter(username__istartswith="ab").explain()
+        self.assertIn("auth_user_username_prefix_idx", plan)
+
+
+class StreamingExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        gone = User.objects.create_user(username="gone", email="gone@example.com", password="x")
+        Order.objects.create(user=cls.admin, items=[], total=100, stripe_session_id="cs_1", payment_status="paid")
+        Order.objects.create(user=gone, items=[], total=50, stripe_session_id="cs_2", payment_status="paid")
+        ActivityLog.objects.create(user=gone, action="User logged in")
+        gone.delete()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_list_payments_survives_deleted_users(self):
+        users = [p["user"] for p in self.client.get("/api/admin/payments/").json()]
+        self.assertEqual(sorted(users), ["Deleted User", "admin"])
+
+    def test_payments_csv_and_logs_ndjson_stream(self):
+        response = self.client.get("/api/admin/payments/export/")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ["id", "user", "amount", "status", "payment_method", "paid_at", "created_at"])
+        self.assertEqual([(r[1], r[2]) for r in rows[1:]], [("admin", "100"), ("", "50")])
+
+        response = self.client.get("/api/admin/logs/export/", {"as": "ndjson"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["action"] for line in lines], ["User logged in"])
+        self.assertIsNone(json.loads(lines[0])["username"])
+
+        tomorrow = str(timezone.localdate() + datetime.timedelta(days=1))
+        empty = self.client.get("/api/admin/payments/export/", {"from": tomorrow})
+        self.assertEqual(len(b"".join(empty.streaming_content).decode().splitlines()), 1)
+        self.assertEqual(self.client.get("/api/admin/logs/export/", {"as": "xml"}).status_code, 400)
+
+
+class ActivityLogWriterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+
+    def test_buffers_until_flush_and_counts_drops(self):
+        writer = ActivityLogWriter(batch_size=10, flush_interval=0, max_queue=3)
+        with override_settings(ACTIVITY_LOG_BUFFERED=True), mock.patch("api.activity._writer", writer):
+            with self.assertNumQueries(0):
+                for i in range(4):
+                    log_activity(self.user, f"event {i}")
+
+        self.assertFalse(ActivityLog.objects.exists())
+        self.assertEqual(writer.stats(), {"queued": 3, "flushed": 0, "dropped": 1})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(writer.flush(), 3)
+        self.assertEqual(
+            list(ActivityLog.objects.order_by("timestamp").values_list("action", flat=True)),
+            ["event 0", "event 1", "event 2"],
+        )
+        self.assertEqual(writer.stats(), {"queued": 0, "flushed": 3, "dropped": 1})
+
+    def test_sync_entries_bypass_the_buffer(self):
+        writer = ActivityLogWriter(flush_interval=0)
+        with override_settings(ACTIVITY_LOG_BUFFERED=True), mock.patch("api.activity._writer", writer):
+            log_activity(self.user.id, "Payment Success - Order #1", sync=True)
+
+        self.assertEqual(writer.stats()["queued"], 0)
+        self.assertTrue(ActivityLog.objects.filter(user=self.user).exists())
+
+
+class ActivityLogArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        now = timezone.now()
+        cls.old_day = timezone.localdate(now - datetime.timedelta(days=40))
+        ActivityLog.objects.bulk_create(
+            [ActivityLog(user=cls.admin, action=f"old {i}", timestamp=now - datetime.timedelta(days=40, minutes=i))
+             for i in range(3)]
+            + [ActivityLog(user=cls.admin, action="older", timestamp=now - datetime.timedelta(days=45))]
+            + [ActivityLog(user=cls.admin, action="recent", timestamp=now)]
+        )
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch("api.log_archive.ACTIVITY_ARCHIVE_DIR", tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.root = tmp.name
+
+    def read_archive(self, day):
+        with gzip.open(archive_path(day, self.root), "rt") as f:
+            return [json.loads(line) for line in f]
+
+    def test_moves_old_entries_into_daily_gzip_files_in_chunks(self):
+        self.assertEqual(archive_logs(days=30, chunk_size=2), 4)
+
+        self.assertEqual(list(ActivityLog.objects.values_list("action", flat=True)), ["recent"])
+        self.assertEqual(sorted(e["action"] for e in self.read_archive(self.old_day)), ["old 0", "old 1", "old 2"])
+        self.assertEqual(self.read_archive(self.old_day)[0]["username"], "admin")
+        self.assertEqual(archive_logs(days=30), 0)
+
+    def test_endpoint_streams_archive_and_live_rows_without_duplicates(self):
+        archive_logs(days=30)
+        # Simulate a crash after the file write: the same chunk appended twice
+        with gzip.open(archive_path(self.old_day, self.root), "rt") as f:
+            again = f.read()
+        with gzip.open(archive_path(self.old_day, self.root), "at") as f:
+            f.write(again)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get("/api/admin/logs/archive/", {
+            "from": str(self.old_day - datetime.timedelta(days=10)), "to": str(timezone.localdate()),
+        })
+        actions = [json.loads(line)["action"] for line in b"".join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(actions, ["older", "old 2", "old 1", "old 0", "recent"])
+        self.assertEqual(client.get("/api/admin/logs/archive/").status_code, 400)
+
+    def test_rows_left_live_by_a_failed_delete_are_streamed_once(self):
+        # The chunk reaches the file, then the DELETE fails and rolls back
+        with mock.patch.object(QuerySet, "delete", side_effect=DatabaseError("disk I/O error")):
+            with self.assertRaises(DatabaseError):
+                archive_logs(days=30)
+        self.assertEqual(len(self.read_archive(self.old_day)), 3)
+        self.assertEqual(ActivityLog.objects.count(), 5)
+
+        today = timezone.localdate()
+        lines = b"".join(
+            line.encode() for line in stream_log_range(self.old_day - datetime.timedelta(days=10), today, None, None)
+        ).decode().splitlines()
+        actions = [json.loads(line)["action"] for line in lines]
+
+        self.assertEqual(actions, ["older", "old 2", "old 1", "old 0", "recent"])
+
+
+class ActivityLogListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@aikart.com", password="x")
+        cls.user = User.objects.create_user(username="buyer", email="buyer@example.com", password="x")
+        now = timezone.now()
+        ActivityLog.objects.bulk_create(
+            [ActivityLog(user=cls.user, action=f"User logged in {i}", timestamp=now - datetime.timedelta(minutes=i % 3))
+             for i in range(6)]
+            + [ActivityLog(user=cls.admin, action="Updated stock", timestamp=now - datetime.timedelta(days=3))]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_cursor_walks_every_entry_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"after": cursor} if cursor else {})}
+            response = self.client.get("/api/admin/logs/", params)
+            seen += [entry["id"] for entry in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        self.assertEqual(seen, list(ActivityLog.objects.order_by("-timestamp", "-id").values_list("id", flat=True)))
+        self.assertEqual(self.client.get("/api/admin/logs/", {"after": "nope"}).status_code, 400)
+
+    def test_filters(self):
+        get = lambda **params: [e["action"] for e in self.client.get("/api/admin/logs/", params).json()]
+
+        self.assertEqual(get(user_id=self.admin.id), ["Updated stock"])
+        self.assertEqual(len(get(action="User logged")), 6)
+        self.assertEqual(get(to=str(timezone.localdate() - datetime.timedelta(days=1))), ["Updated stock"])
+        self.assertEqual(len(get(**{"from": str(timezone.localdate())})), 6)
+
+    def test_user_filter_walks_composite_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan format is vendor specific")
+        plan = ActivityLog.objects.filter(user_id=1).order_by("-timestamp", "-id")[:10].explain()
+        self.assertIn("activitylog_user_time_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class BulkProductUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", email="admin@aikart.com", password="x", is_staff=True
+        )
+        Product.objects.bulk_create([
+            Product(id=i, title=f"P{i}", price_inr=100, stock=1) for i in range(1, 6)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def patch(self, rows):
+        return self.client.patch("/api/admin/products/bulk/", rows, format="json")
+
+    def test_applies_all_changes_in_one_write(self):
+        get_products([1, 2, 3])  # warm the cache
+        rows = [{"id": i, "stock": 50 + i} for i in range(1, 5)] + [
+            {"id": 5, "is_active": False, "price_inr": 250}, {"id": 99, "stock": 1},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(5):  # savepoint, locked read, bulk UPDATE, release, log
+                response = self.patch(rows)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 5)
+        self.assertEqual(response.json()["not_found"], [99])
+        self.assertEqual(Product.objects.get(id=4).stock, 54)
+        self.assertEqual(
+            Product.objects.filter(id=5).values_list("is_active", "price_inr", "stock").get(), (False, 250, 1)
+        )
+        self.assertEqual(get_products([1])[1].stock, 51)
+        self.assertEqual(ActivityLog.objects.filter(action__startswith="Bulk-updated 5 products").count(), 1)
+
+    def test_single_stock_edit_only_writes_stock(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch("/api/admin/products/1/", {"stock": 9}, format="json")
+        update = next(q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('"stock"', update)
+        self.assertNotIn('"reserved"', update)
+
+    def test_django_admin_edits_invalidate_cache(self):
+        superuser = User.objects.create_superuser(username="root", email="root@example.com", password="x")
+        self.client = self.client_class()
+        self.client.force_login(superuser)
+        Product.objects.filter(id=1).update(reserved=1)
+        get_products([1, 2])  # warm the cache
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/admin/api/product/1/change/", {
+                "id": 1, "title": "P1", "price_inr": 300, "category": "", "stock": 1, "is_active": "on",
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(get_products([1])[1].price_inr, 300)
+        self.assertEqual(Product.objects.get(id=1).reserved, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/admin/api/product/2/delete/", {"post": "yes"})
+        self.assertEqual(get_products([2]), {})
+
+    def test_rejects_whole_batch_on_any_invalid_row(self):
+        response = self.patch([{"id": 1, "stock": 5}, {"id": 2, "stock": -1}, {"stock": 3}, {"id": 3}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r["index"] for r in response.json()["rejected"]], [1, 2, 3])
+        self.assertEqual(Product.objects.get(id=1).stock, 1)
+
+
+class InventoryImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", email="admin@aikart.com", password="x", is_staff=True
+        )
+        Product.objects.create(id=1, title="Old", price_inr=100, category="old", stock=1, reserved=1)
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+
+    def test_upserts_in_batches_and_reports_rejects(self):
+        get_products([1])  # warm the cache
+        data = io.StringIO(
+            "id,title,price_inr,category,stock,is_active\n"
+            "1,Renamed,150,phones,40,true\n"
+            "2,New,99,phones,5,0\n"
+            "3,Bad,-5,phones,5,1\n"
+            "\n"
+            "x,Bad id,10,phones,5,1\n"
+            "4,Short row\n"
+            "2,New again,120,phones,6,no\n"
+        )
+
+        with self.assertNumQueries(6):  # one savepoint, INSERT .. ON CONFLICT and release per batch
+            result = import_inventory(data, batch_size=2)
+
+        self.assertEqual((result["rows"], result["imported"], result["rejected"]), (6, 3, 3))
+        self.assertEqual(
+            [(r["line"], r["id"]) for r in result["rejects"]], [(4, "3"), (6, "x"), (7, "4")]
+        )
+        self.assertEqual(
+            Product.objects.filter(id=1).values_list("title", "price_inr", "stock", "reserved").get(),
+            ("Renamed", 150, 40, 1)
+        )
+        self.assertEqual(Product.objects.filter(id=2).values_list("title", "is_active").get(), ("New again", False))
+        self.assertEqual(get_products([1])[1].stock, 40)
+
+    def test_partial_columns_only_update_existing_products(self):
+        result = import_inventory(io.StringIO("id,stock\n1,7\n5,3\n"))
+
+        self.assertEqual(result["imported"], 1)
+        self.assertEqual(result["rejects"][0]["id"], 5)
+        self.assertEqual(Product.objects.get(id=1).title, "Old")
+        self.assertEqual(Product.objects.get(id=1).stock, 7)
+        self.assertFalse(Product.objects.filter(id=5).exists())
+
+    def test_command_prints_throughput(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("id,title,price_inr\n10,Ten,10\n11,Eleven,-1\n")
+        self.addCleanup(os.remove, f.name)
+
+        out = io.StringIO()
+        call_command("import_inventory", f.name, stdout=out)
+
+        self.assertIn("Rejected line 3 (id 11): Price must be positive", out.getvalue())
+        self.assertIn("Imported 1 of 2 rows, rejected 1", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("import_inventory", f.name.replace(".csv", ".missing"), stdout=io.StringIO())
+
+    def test_admin_upload(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        upload = SimpleUploadedFile("stock.csv", "\ufeffid,stock\n1,12\n".encode(), content_type="text/csv")
+
+        response = client.post("/api/admin/products/import/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["imported"], 1)
+        self.assertEqual(Product.objects.get(id=1).stock, 12)
+        self.assertTrue(ActivityLog.objects.filter(action__startswith="Imported inventory CSV stock.csv").exists())
+
+        bad = SimpleUploadedFile("bad.csv", b"sku,stock\nA,1\n", content_type="text/csv")
+        response = client.post("/api/admin/products/import/", {"file": bad}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+    def test_parse_error_part_way_keeps_earlier_rows(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        # The third line's field is over the csv module's size limit
+        upload = SimpleUploadedFile(
+            "stock.csv", b"id,stock\n1,12\n2," + b"9" * 200_000 + b"\n3,1\n", content_type="text/csv"
+        )
+
+        response = client.post("/api/admin/products/import/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["imported"], response.json()["error"]["line"]), (1, 3))
+        self.assertEqual(Product.objects.get(id=1).stock, 12)
+        self.assertTrue(ActivityLog.objects.filter(action__endswith="stopped at line 3").exists())
+
+
+# ============================
+# Product Sync (local fixture server)
+# ============================
+
+class FixtureCatalogHandler(BaseHTTPRequestHandler):
+    products = []
+    failing_skips = set()
+    requests_seen = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        limit, skip = int(query["limit"][0]), int(query["skip"][0])
+        type(self).requests_seen.append(skip)
+
+        if skip in self.failing_skips:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({
+            "products": self.products[skip:skip + limit], "total": len(self.products), "skip": skip, "limit": limit,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ProductSyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_catalog()
+        FixtureCatalogHandler.products = [
+            {"id": i, "title": f"Item {i}", "price": 1.5 * i, "category": "misc", "stock": i} for i in range(1, 8)
+        ]
+        FixtureCatalogHandler.failing_skips = set()
+        FixtureCatalogHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureCatalogHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/products"
+
+    def sync(self, **kwargs):
+        source = ProductSource(url=self.url, page_size=3, workers=3, read_timeout=2)
+        self.addCleanup(source.close)
+        return sync_products(source, **kwargs)
+
+    def test_only_changed_records_are_written(self):
+        result = self.sync(chunk_size=4)
+        self.assertEqual((result["fetched"], result["created"], result["updated"]), (7, 7, 0))
+        self.assertEqual(sorted(FixtureCatalogHandler.requests_seen), [0, 3, 6])
+        self.assertEqual(Product.objects.get(id=2).price_inr, 240)
+
+        # Local edits survive while the upstream record is unchanged
+        Product.objects.filter(id=1).update(stock=0)
+        FixtureCatalogHandler.products[4] = {**FixtureCatalogHandler.products[4], "title": "Renamed"}
+        get_products([5])  # warm the cache
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.sync()
+        writes = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+
+        self.assertEqual((result["created"], result["updated"], result["unchanged"]), (0, 1, 6))
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(Product.objects.get(id=1).stock, 0)
+        self.assertEqual(get_products([5])[5].title, "Renamed")
+
+    def test_failed_pages_and_bad_records_are_reported(self):
+        FixtureCatalogHandler.failing_skips = {3}
+        FixtureCatalogHandler.products[0] = {"id": 1, "title": ""}
+
+        with self.assertLogs("api.product_sync", "WARNING"):
+            result = self.sync()
+
+        self.assertEqual(result["failed_pages"][0]["skip"], 3)
+        self.assertEqual((result["created"], result["invalid"]), (3, 1))
+        self.assertEqual(set(Product.objects.values_list("id", flat=True)), {2, 3, 7})
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("sync_products", url=self.url, page_size=3, stdout=out)
+        self.assertIn("Synced 7 products: 7 created, 0 updated, 0 unchanged", out.getvalue())
+
+        FixtureCatalogHandler.failing_skips = {0}
+        with self.assertRaises(CommandError):
+            call_command("sync_products", url=self.url, page_size=3, stdout=io.StringIO())
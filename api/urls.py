@@ -1,11 +1,25 @@
+from django.conf import settings
 from django.urls import path
+from .views import address, async_views, auth, orders, payments
 from .views.home import home
-from .views.auth import signup, login_user, me
+from .views.auth import signup, login_user
 from .views.profile import update_profile
-from .views.payments import create_checkout_session, stripe_webhook
-from .views.orders import my_orders, order_detail, order_invoice
-from .views.address import address_view
-from .views.admin_panel import analytics, list_users, user_action, list_logs, list_payments, admin_products, admin_product_detail
+from .views.orders import order_detail, order_invoice
+
+if settings.ASYNC_VIEWS:
+    # ASGI deployment: same routes, non-blocking implementations
+    me = async_views.me
+    create_checkout_session = async_views.create_checkout_session
+    stripe_webhook = async_views.stripe_webhook
+    my_orders = async_views.my_orders
+    address_view = async_views.address_view
+else:
+    me = auth.me
+    create_checkout_session = payments.create_checkout_session
+    stripe_webhook = payments.stripe_webhook
+    my_orders = orders.my_orders
+    address_view = address.address_view
+from .views.admin_panel import analytics, sales_breakdown, list_users, user_action, list_logs, list_payments, admin_products, admin_products_bulk, admin_products_import, admin_product_detail, stripe_metrics, activity_metrics, export_invoices, export_payments, export_logs, archived_logs
 
 
 
@@ -76,6 +90,10 @@ urlpatterns = [
         "admin/analytics/",
         analytics
     ),
+    path(
+        "admin/analytics/sales/",
+        sales_breakdown
+    ),
     path(
         "admin/users/",
         list_users
@@ -88,17 +106,49 @@ urlpatterns = [
         "admin/logs/",
         list_logs
     ),
+    path(
+        "admin/logs/export/",
+        export_logs
+    ),
+    path(
+        "admin/logs/archive/",
+        archived_logs
+    ),
     path(
         "admin/payments/",
         list_payments
     ),
+    path(
+        "admin/payments/export/",
+        export_payments
+    ),
     path(
         "admin/products/",
         admin_products
     ),
+    path(
+        "admin/products/bulk/",
+        admin_products_bulk
+    ),
+    path(
+        "admin/products/import/",
+        admin_products_import
+    ),
     path(
         "admin/products/<int:product_id>/",
         admin_product_detail
     ),
+    path(
+        "admin/stripe/metrics/",
+        stripe_metrics
+    ),
+    path(
+        "admin/activity/metrics/",
+        activity_metrics
+    ),
+    path(
+        "admin/invoices/export/",
+        export_invoices
+    ),
 
 ]
\ No newline at end of file
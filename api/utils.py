@@ -1,44 +1,82 @@
-from django.core.cache import cache
+import logging
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from .catalog import lookup_products
 from .models import Product
 
-def validate_cart(items, lock=False):
+log = logging.getLogger(__name__)
+
+
+def _parse_cart_lines(items):
     """
-    Validates cart items against database Products with optional caching.
-    Returns: Dict with 'valid_items' and 'removed_items'
+    Normalizes raw cart lines into (product_id, quantity) tuples.
+    Malformed lines are skipped silently (self-healing cart).
     """
-    valid_items = []
-    removed_items = []
-
+    lines = []
     for item in items:
         product_id = item.get("product_id")
         quantity = item.get("quantity")
 
         if product_id is None or quantity is None:
-            # Skip invalid formats silently or log? 
-            # User wants self-healing, skipping is best.
             continue
 
         try:
-            product_id = int(product_id)
-            quantity = int(quantity)
+            lines.append((int(product_id), int(quantity)))
         except (TypeError, ValueError):
             continue
 
+    return lines
+
+
+def _fetch_products(product_ids, lock=False, fresh=False):
+    """
+    Loads every referenced product in a single id__in query.
+    When locking, rows are locked in ascending id order so that concurrent
+    checkouts touching the same products can never deadlock.
+    Other reads are served from the in-process catalog snapshot, unless
+    `fresh` asks for the current rows (read from the database, unlocked).
+    """
+    if not product_ids:
+        return {}
+
+    if fresh and not lock:
+        return Product.objects.in_bulk(list(product_ids))
+
+    if not lock:
+        return lookup_products(product_ids)
+
+    query = Product.objects.filter(id__in=product_ids).select_for_update().order_by("id")
+
+    return {product.id: product for product in query}
+
+
+def validate_cart(items, lock=False, fresh=False):
+    """
+    Validates cart items against Products (snapshot unless locking or
+    `fresh`; see _fetch_products).
+    Returns: Dict with 'valid_items' and 'removed_items'
+    """
+    valid_items = []
+    removed_items = []
+
+    lines = _parse_cart_lines(items)
+    products = _fetch_products(
+        {product_id for product_id, quantity in lines if quantity >= 1},
+        lock=lock,
+        fresh=fresh
+    )
+
+    for product_id, quantity in lines:
         if quantity < 1:
             removed_items.append({"product_id": product_id, "reason": "invalid_quantity"})
             continue
 
-        # Fetch Product
-        query = Product.objects
-        if lock:
-            query = query.select_for_update()
-
-        product = query.filter(id=product_id).first()
+        product = products.get(product_id)
         exists = product is not None
 
         # Structured Logging (As requested by DEBUG requirements)
-        import logging
-        log = logging.getLogger(__name__)
         log.warning(
             f"[CartValidation] ID={product_id} Exists={exists} "
             f"Active={product.is_active if exists else 'N/A'} "
@@ -64,8 +102,8 @@ def validate_cart(items, lock=False):
         # 4. Quantity adjustment
         if quantity > product.stock:
             removed_items.append({
-                "product_id": product_id, 
-                "reason": "quantity_adjusted", 
+                "product_id": product_id,
+                "reason": "quantity_adjusted",
                 "title": product.title,
                 "original_qty": quantity,
                 "new_qty": product.stock
@@ -83,3 +121,91 @@ def validate_cart(items, lock=False):
         "valid_items": valid_items,
         "removed_items": removed_items
     }
+
+
+class _PartialUpdate(Exception):
+    pass
+
+
+def _available():
+    return F("stock") - F("reserved")
+
+
+def _update_bulk(quantities, line_condition, line_updates):
+    """
+    One conditional UPDATE for every line, e.g. for a plain deduction:
+    stock = CASE id WHEN pid THEN stock - qty ... END
+    WHERE (id = pid AND stock - reserved >= qty) OR ...
+    Returns the affected-row count.
+    """
+    condition = Q()
+    whens = {field: [] for field in line_updates}
+    for product_id, quantity in quantities.items():
+        condition |= Q(id=product_id) & line_condition(quantity)
+        for field, expression in line_updates.items():
+            whens[field].append(When(id=product_id, then=expression(quantity)))
+
+    return Product.objects.filter(condition).update(**{
+        field: Case(*field_whens, default=F(field))
+        for field, field_whens in whens.items()
+    })
+
+
+def _update_each(quantities, line_condition, line_updates, available):
+    """
+    Per-line fallback after a lost race: apply the full quantity if it still
+    fits, otherwise whatever is left. The conditions keep every counter
+    within bounds.
+    """
+    applied = {}
+    for product_id, quantity in sorted(quantities.items()):
+        for attempt in range(2):
+            if attempt:
+                left = (
+                    Product.objects.filter(id=product_id)
+                    .annotate(left=available).values_list("left", flat=True).first()
+                ) or 0
+                quantity = min(left, quantity)
+                if quantity <= 0:
+                    break
+
+            rows = Product.objects.filter(Q(id=product_id) & line_condition(quantity))
+            if rows.update(**{field: expression(quantity) for field, expression in line_updates.items()}):
+                applied[product_id] = quantity
+                break
+
+    return applied
+
+
+def apply_stock_change(quantities, line_condition, line_updates, available=None):
+    """
+    Applies a per-product counter change without holding row locks up front.
+    The common case is a single conditional bulk UPDATE; when the affected
+    row count shows that some lines lost a race, the bulk update is rolled
+    back and the lines are retried one by one.
+    Returns {product_id: applied_quantity} (lines that got nothing are absent).
+    """
+    if not quantities:
+        return {}
+
+    try:
+        with transaction.atomic():
+            if _update_bulk(quantities, line_condition, line_updates) != len(quantities):
+                raise _PartialUpdate()
+        return dict(quantities)
+    except _PartialUpdate:
+        log.warning(f"[StockUpdate] Partial bulk update, retrying per line: {quantities}")
+
+    return _update_each(quantities, line_condition, line_updates, available or _available())
+
+
+def deduct_stock(quantities):
+    """
+    Deducts {product_id: quantity} from unreserved stock:
+    stock = stock - qty WHERE stock - reserved >= qty.
+    """
+    return apply_stock_change(
+        quantities,
+        lambda qty: Q(stock__gte=F("reserved") + qty),
+        {"stock": lambda qty: F("stock") - qty},
+    )
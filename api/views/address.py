@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from ..conditional import address_validators, address_version_query
 from ..models import Address
 
 
@@ -10,45 +11,39 @@ from ..models import Address
 # ADDRESS
 # ==================================================
 
+ADDRESS_FIELDS = ["full_name", "phone", "street", "city", "state", "pincode"]
+
+
+def address_payload(address):
+    return {"id": address.id, **{field: getattr(address, field) for field in ADDRESS_FIELDS}}
+
+
 @csrf_exempt
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def address_view(request):
 
     if request.method == "GET":
+        validators = address_validators(request.user, address_version_query(request.user).first())
+        not_modified = validators.not_modified(request)
+        if not_modified:
+            return not_modified
+
         try:
             address = Address.objects.get(user=request.user)
-            return Response(
-                {
-                    "id": address.id,
-                    "full_name": address.full_name,
-                    "phone": address.phone,
-                    "street": address.street,
-                    "city": address.city,
-                    "state": address.state,
-                    "pincode": address.pincode,
-                }
-            )
+            return validators.apply(Response(address_payload(address)))
         except Address.DoesNotExist:
-            return Response({}, status=200)
+            return validators.apply(Response({}, status=200))
 
     # POST
     data = request.data
-    required_fields = ["full_name", "phone", "street", "city", "state", "pincode"]
 
-    if not all(data.get(field) for field in required_fields):
+    if not all(data.get(field) for field in ADDRESS_FIELDS):
         return Response({"error": "All address fields are required"}, status=400)
 
     address, created = Address.objects.update_or_create(
         user=request.user,
-        defaults={
-            "full_name": data["full_name"],
-            "phone": data["phone"],
-            "street": data["street"],
-            "city": data["city"],
-            "state": data["state"],
-            "pincode": data["pincode"],
-        }
+        defaults={field: data[field] for field in ADDRESS_FIELDS}
     )
 
     return Response({"id": address.id, "created": created}, status=201)
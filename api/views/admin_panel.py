@@ -1,18 +1,31 @@
 from django.contrib.auth import get_user_model
 User = get_user_model()
-from django.db.models import Sum
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 
 from ..models import Order, Profile, ActivityLog, Product
 
 
+from ..activity import get_activity_writer, log_activity
+from ..catalog import get_catalog
+from ..exports import (
+    CONTENT_TYPES, LOG_FIELDS, PAYMENT_FIELDS, date_bounds, logs_queryset, payments_queryset, stream_export,
+)
+from ..inventory_import import import_inventory
+from ..invoice_export import orders_between, stream_invoice_zip
+from ..log_archive import stream_log_range
+from ..pagination import before, decode_cursor, encode_cursor, with_next_cursor
 from ..permissions import IsCustomAdmin
+from ..product_cache import invalidate_products
+from ..sales import ANALYTICS_WINDOWS, category_revenue, daily_series, sales_windows, top_products
+from ..stripe_client import get_stripe_gateway
 
 import datetime
+import io
 
 
 # ==================================================
@@ -22,34 +35,40 @@ import datetime
 @api_view(["GET"])
 @permission_classes([IsCustomAdmin])
 def analytics(request):
-    total_users = User.objects.count()
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(Sum("total"))["total__sum"] or 0
-
-    # Daily Sales (Last 7 Days)
-    today = timezone.now().date()
-    sales_data = []
-    for i in range(6, -1, -1):
-        date = today - datetime.timedelta(days=i)
-        # Handle date lookup safely depending on DB
-        # MySQL/Postgres support __date, SQLite might need range
-        start_time = timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
-        end_time = timezone.make_aware(datetime.datetime.combine(date, datetime.time.max))
-        
-        day_sales = Order.objects.filter(
-            created_at__range=(start_time, end_time)
-        ).aggregate(Sum("total"))["total__sum"] or 0
-        
-        sales_data.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "revenue": day_sales
-        })
+    # Order totals come from the DailySales rollup, not the orders table
+    try:
+        days = int(request.GET.get("days", 7))
+    except ValueError:
+        days = None
+    if days not in ANALYTICS_WINDOWS:
+        return Response({"error": f"days must be one of {ANALYTICS_WINDOWS}"}, status=400)
+
+    today = timezone.localdate()
+    return Response({
+        "total_users": User.objects.count(),
+        **sales_windows(today),
+        "daily_sales": daily_series(today, days),
+    })
+
+
+# ==================================================
+# ADMIN - PRODUCT / CATEGORY SALES
+# ==================================================
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def sales_breakdown(request):
+    try:
+        days = int(request.GET.get("days", 30))
+        limit = max(1, min(int(request.GET.get("limit", 10)), 100))
+    except ValueError:
+        return Response({"error": "days and limit must be integers"}, status=400)
 
+    since = timezone.now() - datetime.timedelta(days=days) if days > 0 else None
     return Response({
-        "total_users": total_users,
-        "total_orders": total_orders,
-        "total_revenue": total_revenue,
-        "daily_sales": sales_data
+        "days": days,
+        "top_products": top_products(since, limit),
+        "categories": category_revenue(since),
     })
 
 
@@ -57,23 +76,77 @@ def analytics(request):
 # ADMIN - USERS LIST
 # ==================================================
 
+USERS_PAGE_SIZE = 50
+MAX_USERS_PAGE_SIZE = 200
+
+
+def users_page_query(params):
+    """
+    Newest-first page of users with their profile joined in, filtered by
+    profile `status`, `is_active` and a username/email prefix `q`
+    (backed by the case-insensitive prefix indexes from migration 0022).
+    `after` is a keyset cursor on id. Raises ValueError on bad params.
+    """
+    limit = max(1, min(int(params.get("limit", USERS_PAGE_SIZE)), MAX_USERS_PAGE_SIZE))
+    users = User.objects.select_related("profile").order_by("-id")
+
+    if params.get("after"):
+        (last_id,) = decode_cursor(params["after"], int)
+        users = users.filter(id__lt=last_id)
+
+    status = params.get("status")
+    if status:
+        # Users without a profile row yet are active by default
+        match = Q(profile__status=status)
+        users = users.filter(match | Q(profile__isnull=True) if status == "active" else match)
+
+    if params.get("is_active") in ("true", "false"):
+        users = users.filter(is_active=params["is_active"] == "true")
+
+    q = params.get("q", "").strip()
+    if q:
+        users = users.filter(Q(username__istartswith=q) | Q(email__istartswith=q))
+
+    return users[:limit + 1], limit
+
+
+def _with_profiles(users):
+    """
+    Creates the missing profiles of a page in one INSERT.
+    """
+    missing = [u for u in users if not hasattr(u, "profile")]
+    if missing:
+        Profile.objects.bulk_create([Profile(user=u) for u in missing], ignore_conflicts=True)
+        profiles = Profile.objects.in_bulk([u.id for u in missing], field_name="user_id")
+        for u in missing:
+            u.profile = profiles[u.id]
+    return users
+
+
 @api_view(["GET"])
 @permission_classes([IsCustomAdmin])
 def list_users(request):
-    # Get all users (sorted by ID)
-    users = User.objects.all().order_by("-id")
-    data = []
-    for u in users:
-        profile, _ = Profile.objects.get_or_create(user=u)
-        data.append({
+    try:
+        users, limit = users_page_query(request.GET)
+    except ValueError:
+        return Response({"error": "Invalid pagination parameters"}, status=400)
+
+    users = list(users)
+    page = _with_profiles(users[:limit])
+    next_cursor = encode_cursor(page[-1].id) if len(users) > limit else None
+
+    data = [
+        {
             "id": u.id,
             "username": u.username,
             "email": u.email,
             "date_joined": u.date_joined,
-            "status": profile.status,
+            "status": u.profile.status,
             "is_active": u.is_active,
-        })
-    return Response(data)
+        }
+        for u in page
+    ]
+    return with_next_cursor(Response(data), next_cursor)
 
 
 # ==================================================
@@ -118,7 +191,7 @@ def user_action(request, user_id):
         username = user.username
         with transaction.atomic():
             user.delete()
-            ActivityLog.objects.create(user=request.user, action=f"Hard-deleted user {username} (ID: {user_id})")
+            log_activity(request.user, f"Hard-deleted user {username} (ID: {user_id})", sync=True)
         
         return Response({"message": f"User {username} permanently deleted", "status": "deleted"})
     else:
@@ -127,10 +200,7 @@ def user_action(request, user_id):
     profile.save()
     user.save()
     
-    ActivityLog.objects.create(
-        user=request.user, 
-        action=f"{action.capitalize()}ed user {user.username}"
-    )
+    log_activity(request.user, f"{action.capitalize()}ed user {user.username}")
 
     return Response({"message": f"User {action}ed successfully", "status": profile.status})
 
@@ -139,10 +209,49 @@ def user_action(request, user_id):
 # ADMIN - ACTIVITY LOGS
 # ==================================================
 
+LOGS_PAGE_SIZE = 100
+MAX_LOGS_PAGE_SIZE = 500
+
+
+def logs_page_query(params):
+    """
+    Newest-first page of activity logs, filtered by `user_id`, `action`
+    prefix and `from`/`to` dates. `after` is a keyset cursor on
+    (timestamp, id); every filter combination walks the (-timestamp, -id)
+    or (user, -timestamp, -id) index, so deep pages cost the same as the
+    first. Raises ValueError on bad params.
+    """
+    limit = max(1, min(int(params.get("limit", LOGS_PAGE_SIZE)), MAX_LOGS_PAGE_SIZE))
+    since, until = date_bounds(params)
+
+    logs = ActivityLog.objects.select_related("user").order_by("-timestamp", "-id")
+    if params.get("user_id"):
+        logs = logs.filter(user_id=int(params["user_id"]))
+    if params.get("action"):
+        logs = logs.filter(action__startswith=params["action"])
+    if since:
+        logs = logs.filter(timestamp__gte=since)
+    if until:
+        logs = logs.filter(timestamp__lt=until)
+    if params.get("after"):
+        timestamp, last_id = decode_cursor(params["after"], datetime.datetime, int)
+        logs = logs.filter(before("timestamp", timestamp, last_id))
+
+    return logs[:limit + 1], limit
+
+
 @api_view(["GET"])
 @permission_classes([IsCustomAdmin])
 def list_logs(request):
-    logs = ActivityLog.objects.select_related("user").all().order_by("-timestamp")[:100]
+    try:
+        logs, limit = logs_page_query(request.GET)
+    except ValueError:
+        return Response({"error": "Invalid filter or pagination parameters"}, status=400)
+
+    logs = list(logs)
+    page = logs[:limit]
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if len(logs) > limit else None
+
     data = [
         {
             "id": l.id,
@@ -150,9 +259,9 @@ def list_logs(request):
             "action": l.action,
             "timestamp": l.timestamp
         }
-        for l in logs
+        for l in page
     ]
-    return Response(data)
+    return with_next_cursor(Response(data), next_cursor)
 
 # ==================================================
 # ADMIN - PAYMENTS
@@ -165,7 +274,7 @@ def list_payments(request):
     data = [
         {
             "id": p.id,
-            "user": p.user.username,
+            "user": p.user.username if p.user else "Deleted User",
             "amount": p.total,
             "status": p.payment_status,
             "payment_method": p.payment_method,
@@ -177,12 +286,61 @@ def list_payments(request):
     return Response(data)
 
 
+# ==================================================
+# ADMIN - STREAMING EXPORTS
+# ==================================================
+
+def _export(request, queryset_for, fields, filename):
+    # Not "format": DRF reserves that query parameter for renderer selection
+    fmt = request.GET.get("as", "csv")
+    if fmt not in CONTENT_TYPES:
+        return Response({"error": f"as must be one of {sorted(CONTENT_TYPES)}"}, status=400)
+    try:
+        since, until = date_bounds(request.GET)
+    except ValueError:
+        return Response({"error": "from and to must be YYYY-MM-DD dates"}, status=400)
+
+    return stream_export(queryset_for(since, until), fields, fmt, filename)
+
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def export_payments(request):
+    return _export(request, payments_queryset, PAYMENT_FIELDS, "payments")
+
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def export_logs(request):
+    return _export(request, logs_queryset, LOG_FIELDS, "activity_logs")
+
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def archived_logs(request):
+    """
+    Activity logs for a date range as NDJSON, from the archive files and
+    the live table alike.
+    """
+    try:
+        start = datetime.date.fromisoformat(request.GET["from"])
+        end = datetime.date.fromisoformat(request.GET["to"])
+        since, until = date_bounds(request.GET)
+    except (KeyError, ValueError):
+        return Response({"error": "from and to must be YYYY-MM-DD dates"}, status=400)
+
+    response = StreamingHttpResponse(
+        stream_log_range(start, end, since, until), content_type=CONTENT_TYPES["ndjson"]
+    )
+    response["Content-Disposition"] = f'attachment; filename="activity_logs_{start}_{end}.ndjson"'
+    return response
+
+
 @api_view(["GET"])
 @permission_classes([IsCustomAdmin])
 def admin_products(request):
     if not request.user.is_authenticated or not request.user.is_staff:
         return HttpResponse(status=403)
-    products = Product.objects.all().order_by("id")
     data = [
         {
             "id": p.id,
@@ -191,7 +349,7 @@ def admin_products(request):
             "stock": p.stock,
             "category": p.category
         }
-        for p in products
+        for p in get_catalog()
     ]
     return Response(data)
 
@@ -215,15 +373,12 @@ def admin_product_detail(request, product_id):
         except ValueError:
             return Response({"error": "Invalid stock value"}, status=400)
 
-    product.save()
-    
-    from django.core.cache import cache
-    cache.delete(f"product_{product_id}")
+        # Only the stock column: a full save would overwrite `reserved`,
+        # which concurrent checkouts keep changing
+        product.save(update_fields=["stock"])
+        invalidate_products([product_id])
 
-    ActivityLog.objects.create(
-        user=request.user, 
-        action=f"Updated stock for Product #{product_id} to {product.stock}"
-    )
+    log_activity(request.user, f"Updated stock for Product #{product_id} to {product.stock}")
 
     return Response({
         "message": "Product stock updated successfully",
@@ -231,3 +386,192 @@ def admin_product_detail(request, product_id):
         "stock": product.stock
     })
 
+
+# ==================================================
+# ADMIN - BULK PRODUCT UPDATE
+# ==================================================
+
+def _as_int(value, field):
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid {field} value")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {field} value")
+
+
+def _stock(value):
+    value = _as_int(value, "stock")
+    if value < 0:
+        raise ValueError("Stock cannot be negative")
+    return value
+
+
+def _price(value):
+    value = _as_int(value, "price_inr")
+    if value <= 0:
+        raise ValueError("Price must be positive")
+    return value
+
+
+def _active(value):
+    if not isinstance(value, bool):
+        raise ValueError("is_active must be true or false")
+    return value
+
+
+BULK_PRODUCT_FIELDS = {"stock": _stock, "price_inr": _price, "is_active": _active}
+MAX_BULK_PRODUCTS = 5000
+
+
+def parse_product_changes(rows):
+    """
+    Validates [{id, stock?, price_inr?, is_active?}] into
+    {id: {field: value}} (later rows for the same id win).
+    Returns (changes, errors) with errors as [{index, id, error}].
+    """
+    changes, errors = {}, []
+    for index, row in enumerate(rows):
+        row = row if isinstance(row, dict) else {}
+        try:
+            product_id = _as_int(row.get("id"), "id")
+            fields = {
+                field: convert(row[field])
+                for field, convert in BULK_PRODUCT_FIELDS.items()
+                if row.get(field) is not None
+            }
+            if not fields:
+                raise ValueError(f"Nothing to update; expected one of {sorted(BULK_PRODUCT_FIELDS)}")
+        except ValueError as e:
+            errors.append({"index": index, "id": row.get("id"), "error": str(e)})
+            continue
+        changes.setdefault(product_id, {}).update(fields)
+    return changes, errors
+
+
+@api_view(["PATCH"])
+@permission_classes([IsCustomAdmin])
+def admin_products_bulk(request):
+    """
+    Applies many product changes at once: one locked read, one
+    bulk_update per 500 rows, one cache invalidation and one summary log
+    entry. Nothing is written if any change is invalid.
+    """
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return HttpResponse(status=403)
+
+    rows = request.data if isinstance(request.data, list) else request.data.get("products")
+    if not isinstance(rows, list) or not rows:
+        return Response({"error": "Expected a non-empty list of product changes"}, status=400)
+    if len(rows) > MAX_BULK_PRODUCTS:
+        return Response({"error": f"At most {MAX_BULK_PRODUCTS} changes per request"}, status=400)
+
+    changes, errors = parse_product_changes(rows)
+    if errors:
+        return Response({"error": "Invalid product changes", "rejected": errors}, status=400)
+
+    with transaction.atomic():
+        products = Product.objects.select_for_update().in_bulk(list(changes))
+        fields = set()
+        for product_id, product in products.items():
+            for field, value in changes[product_id].items():
+                setattr(product, field, value)
+                fields.add(field)
+
+        if products:
+            Product.objects.bulk_update(products.values(), sorted(fields), batch_size=500)
+            transaction.on_commit(lambda: invalidate_products(products.keys()))
+
+    not_found = sorted(set(changes) - set(products))
+    if products:
+        ids = sorted(products)
+        log_activity(
+            request.user,
+            f"Bulk-updated {len(ids)} products ({', '.join(sorted(fields))}): "
+            f"#{ids[0]}..#{ids[-1]}"[:255]
+        )
+
+    return Response({
+        "message": "Products updated successfully",
+        "updated": len(products),
+        "fields": sorted(fields),
+        "not_found": not_found,
+    })
+
+
+# ==================================================
+# ADMIN - CSV INVENTORY IMPORT
+# ==================================================
+
+@api_view(["POST"])
+@permission_classes([IsCustomAdmin])
+def admin_products_import(request):
+    """
+    Multipart upload (`file`) of an inventory CSV; see api.inventory_import.
+    Valid rows are written even when others are rejected, or when the file
+    stops parsing part way (`error` in the report).
+    """
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return HttpResponse(status=403)
+
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"error": "Upload the CSV as `file`"}, status=400)
+
+    try:
+        # Decoded as it is parsed; the upload is never read into one string
+        result = import_inventory(io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    action = f"Imported inventory CSV {upload.name}: {result['imported']} products, {result['rejected']} rejected"
+    if result["error"]:
+        action += f", stopped at line {result['error']['line']}"
+    log_activity(request.user, action[:255])
+
+    message = "Inventory partially imported" if result["error"] else "Inventory imported"
+    return Response({"message": message, **result})
+
+
+# ==================================================
+# ADMIN - STRIPE CLIENT / ACTIVITY WRITER HEALTH
+# ==================================================
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def stripe_metrics(request):
+    gateway = get_stripe_gateway()
+    return Response({
+        "circuit": gateway.breaker.state,
+        **gateway.metrics.snapshot()
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def activity_metrics(request):
+    return Response(get_activity_writer().stats())
+
+
+# ==================================================
+# ADMIN - BULK INVOICE EXPORT
+# ==================================================
+
+@api_view(["GET"])
+@permission_classes([IsCustomAdmin])
+def export_invoices(request):
+    try:
+        start = datetime.date.fromisoformat(request.GET["from"])
+        end = datetime.date.fromisoformat(request.GET["to"])
+    except (KeyError, ValueError):
+        return Response({"error": "from and to must be YYYY-MM-DD dates"}, status=400)
+
+    if end < start:
+        return Response({"error": "to must not be before from"}, status=400)
+
+    response = StreamingHttpResponse(
+        stream_invoice_zip(orders_between(start, end)),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = f'attachment; filename="invoices_{start}_{end}.zip"'
+    return response
@@ -0,0 +1,223 @@
+import json
+import logging
+from functools import wraps
+
+import stripe
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from ..checkout import CheckoutError, abort_checkout, finalize_checkout, prepare_checkout, session_params
+from ..conditional import (
+    ORDERS_STATE, address_validators, address_version_query, orders_state_query, orders_validators,
+    profile_validators, profile_version_query,
+)
+from ..models import Address, Profile
+from ..pagination import with_next_cursor
+from ..stripe_client import StripeUnavailable, get_stripe_gateway
+from ..webhooks import aenqueue_event
+from .address import ADDRESS_FIELDS, address_payload
+from .auth import me_payload
+from .orders import orders_page, orders_page_query
+from .payments import PAYMENTS_UNAVAILABLE, STRIPE_WEBHOOK_SECRET
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# ASYNC VIEWS
+# Same contracts as the DRF views; served when ASYNC_VIEWS is enabled and
+# the app runs under backend.asgi (e.g. uvicorn workers), so slow Stripe
+# round trips no longer pin a worker.
+# ==================================================
+
+def api_response(data, status=200):
+    # DRF's encoder keeps datetimes identical to the sync views
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+async def authenticate(request):
+    """
+    JWT authentication without blocking: token checks are pure CPU, the
+    user is loaded with the async ORM.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+
+    try:
+        token = auth.get_validated_token(raw_token)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+    return await User.objects.filter(
+        **{jwt_settings.USER_ID_FIELD: user_id}, is_active=True
+    ).afirst()
+
+
+def jwt_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return api_response({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def json_body(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+
+
+# ==================================================
+# ME
+# ==================================================
+
+@require_http_methods(["GET"])
+@jwt_required
+async def me(request):
+    updated_at = await profile_version_query(request.user).afirst()
+    if updated_at is not None:
+        not_modified = profile_validators(request.user, updated_at).not_modified(request)
+        if not_modified:
+            return not_modified
+
+    profile, _ = await Profile.objects.aget_or_create(user=request.user)
+    return profile_validators(request.user, profile.updated_at).apply(
+        api_response(me_payload(request.user, profile))
+    )
+
+
+# ==================================================
+# ORDERS
+# ==================================================
+
+@require_http_methods(["GET"])
+@jwt_required
+async def my_orders(request):
+    try:
+        orders, limit = orders_page_query(request.user, request.GET)
+    except ValueError:
+        return api_response({"error": "Invalid pagination parameters"}, status=400)
+
+    validators = orders_validators(
+        request.user, request.GET, await orders_state_query(request.user).aaggregate(**ORDERS_STATE)
+    )
+    not_modified = validators.not_modified(request)
+    if not_modified:
+        return not_modified
+
+    data, next_cursor = orders_page([o async for o in orders], limit)
+    return validators.apply(with_next_cursor(api_response(data), next_cursor))
+
+
+# ==================================================
+# ADDRESS
+# ==================================================
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@jwt_required
+async def address_view(request):
+
+    if request.method == "GET":
+        validators = address_validators(request.user, await address_version_query(request.user).afirst())
+        not_modified = validators.not_modified(request)
+        if not_modified:
+            return not_modified
+
+        address = await Address.objects.filter(user=request.user).afirst()
+        return validators.apply(api_response(address_payload(address) if address else {}))
+
+    # POST
+    data = json_body(request)
+
+    if not data or not all(data.get(field) for field in ADDRESS_FIELDS):
+        return api_response({"error": "All address fields are required"}, status=400)
+
+    address, created = await Address.objects.aupdate_or_create(
+        user=request.user,
+        defaults={field: data[field] for field in ADDRESS_FIELDS}
+    )
+
+    return api_response({"id": address.id, "created": created}, status=201)
+
+
+# ==================================================
+# STRIPE CHECKOUT
+# ==================================================
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@jwt_required
+async def create_checkout_session(request):
+    user = request.user
+    try:
+        logger.info(f"Checkout Start for user_id={user.id}")
+        data = json_body(request) or {}
+
+        # Validation and reservations need transactions, which the async
+        # ORM does not support; they run through sync_to_async.
+        try:
+            prepared = await sync_to_async(prepare_checkout)(data.get("items", []))
+        except CheckoutError as e:
+            return api_response({"error": e.message}, status=e.status)
+
+        try:
+            session = await get_stripe_gateway().create_checkout_session_async(
+                session_params(user, prepared["line_items"])
+            )
+        except StripeUnavailable:
+            await sync_to_async(abort_checkout)(prepared)
+            return api_response({"error": PAYMENTS_UNAVAILABLE}, status=503)
+        except Exception:
+            await sync_to_async(abort_checkout)(prepared)
+            raise
+
+        return api_response(await sync_to_async(finalize_checkout)(user, session, prepared))
+
+    except Exception as e:
+        logger.error(f"STRIPE CHECKOUT ERROR: {str(e)}")
+        return api_response({"error": f"Checkout Failed: {str(e)}"}, status=500)
+
+
+# ==================================================
+# STRIPE WEBHOOK
+# ==================================================
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def stripe_webhook(request):
+    payload = request.body
+    sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
+
+    try:
+        event = stripe.Webhook.construct_event(
+            payload,
+            sig_header,
+            STRIPE_WEBHOOK_SECRET
+        )
+    except Exception:
+        logger.error({
+            "event": "invalid_webhook_signature"
+        })
+        return HttpResponse(status=400)
+
+    await aenqueue_event(json.loads(payload))
+    logger.info(f"Webhook Received: {event['type']} ({event['id']})")
+
+    return HttpResponse(status=200)
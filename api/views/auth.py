@@ -5,7 +5,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from ..models import Profile, ActivityLog
+from ..activity import log_activity
+from ..conditional import profile_validators, profile_version_query
+from ..models import Profile
 import logging
 log = logging.getLogger(__name__)
 
@@ -57,7 +59,7 @@ def signup(request):
         status="active"
     )
 
-    ActivityLog.objects.create(user=user, action="User signed up")
+    log_activity(user, "User signed up")
 
     refresh = RefreshToken.for_user(user)
 
@@ -95,7 +97,7 @@ def login_user(request):
             Profile.objects.get_or_create(user=user, defaults={"avatar": "/avatars/a1.png", "theme": "light"})
         
         refresh = RefreshToken.for_user(user)
-        ActivityLog.objects.create(user=user, action="Admin logged in")
+        log_activity(user, "Admin logged in")
         
         return Response(
             {
@@ -124,7 +126,7 @@ def login_user(request):
     if profile.status != "active":
         return Response({"error": f"Account is {profile.status}"}, status=403)
 
-    ActivityLog.objects.create(user=user, action="User logged in")
+    log_activity(user, "User logged in")
 
     refresh = RefreshToken.for_user(user)
 
@@ -148,13 +150,23 @@ def login_user(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def me(request):
+    updated_at = profile_version_query(request.user).first()
+    if updated_at is not None:
+        not_modified = profile_validators(request.user, updated_at).not_modified(request)
+        if not_modified:
+            return not_modified
+
     profile, _ = Profile.objects.get_or_create(user=request.user)
-    return Response(
-        {
-            "id": request.user.id,
-            "username": request.user.username,
-            "email": request.user.email,
-            "avatar": profile.avatar,
-            "theme": profile.theme,
-        }
+    return profile_validators(request.user, profile.updated_at).apply(
+        Response(me_payload(request.user, profile))
     )
+
+
+def me_payload(user, profile):
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "avatar": profile.avatar,
+        "theme": profile.theme,
+    }
@@ -1,50 +1,99 @@
-import io
+import datetime
 from django.http import FileResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-
+from ..conditional import (
+    ORDERS_STATE, Validators, order_validators, order_version_query, orders_state_query, orders_validators,
+)
+from ..invoices import ensure_invoice, get_invoice_storage, invoice_digest
 from ..models import Order
+from ..pagination import before, decode_cursor, encode_cursor, with_next_cursor
+
+MAX_PAGE_SIZE = 100
+
+# Invoices only change if the customer's details do (new ETag), so a short
+# private lifetime plus revalidation is safe.
+INVOICE_CACHE_CONTROL = "private, max-age=3600"
 
 
 # ==================================================
 # ORDERS
 # ==================================================
 
+def order_summary(o):
+    return {
+        "id": o.id,
+        "total": o.total,
+        "items": o.items,
+        "payment_status": o.payment_status,
+        "created_at": o.created_at,
+        "stripe_session_id": o.stripe_session_id,
+    }
+
+
+def orders_page_query(user, params):
+    """
+    Newest-first page of a user's orders. `after` is an opaque keyset cursor
+    on (created_at, id) served by the (user, -created_at, -id) index;
+    `offset` is kept only for older clients. One extra row is fetched to
+    detect whether a next page exists. Raises ValueError on bad params.
+    """
+    limit = max(1, min(int(params.get("limit", 10)), MAX_PAGE_SIZE))
+    offset = int(params.get("offset", 0))
+    after = params.get("after")
+
+    orders = Order.objects.filter(user=user).order_by("-created_at", "-id")
+    if after:
+        created_at, last_id = decode_cursor(after, datetime.datetime, int)
+        orders = orders.filter(before("created_at", created_at, last_id))
+    elif offset:
+        orders = orders[offset:]
+
+    return orders[:limit + 1], limit
+
+
+def orders_page(orders, limit):
+    page = orders[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(orders) > limit else None
+    return [order_summary(o) for o in page], next_cursor
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def my_orders(request):
     try:
-        limit = int(request.GET.get("limit", 10))
-        offset = int(request.GET.get("offset", 0))
+        orders, limit = orders_page_query(request.user, request.GET)
     except ValueError:
         return Response({"error": "Invalid pagination parameters"}, status=400)
 
-    orders = Order.objects.filter(user=request.user).order_by("-created_at")[offset:offset+limit]
-    return Response(
-        [
-            {
-                "id": o.id,
-                "total": o.total,
-                "items": o.items,
-                "payment_status": o.payment_status,
-                "created_at": o.created_at,
-                "stripe_session_id": o.stripe_session_id,
-            }
-            for o in orders
-        ]
+    validators = orders_validators(
+        request.user, request.GET, orders_state_query(request.user).aggregate(**ORDERS_STATE)
     )
+    not_modified = validators.not_modified(request)
+    if not_modified:
+        return not_modified
+
+    data, next_cursor = orders_page(list(orders), limit)
+    return validators.apply(with_next_cursor(Response(data), next_cursor))
 
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def order_detail(request, order_id):
+    version = order_version_query(request.user, order_id).first()
+    if version is None:
+        return Response({"error": "Order not found"}, status=404)
+
+    validators = order_validators(order_id, version)
+    not_modified = validators.not_modified(request)
+    if not_modified:
+        return not_modified
+
     order = Order.objects.get(id=order_id, user=request.user)
-    return Response(
+    return validators.apply(Response(
         {
             "id": order.id,
             "total": order.total,
@@ -52,35 +101,31 @@ def order_detail(request, order_id):
             "created_at": order.created_at,
             "stripe_session_id": order.stripe_session_id,
         }
-    )
+    ))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def order_invoice(request, order_id):
     try:
-        order = Order.objects.get(id=order_id)
+        order = Order.objects.select_related("user").get(id=order_id)
         if order.user != request.user:
             return Response({"error": "Unauthorized"}, status=403)
     except Order.DoesNotExist:
         return Response({"error": "Order not found"}, status=404)
 
-    buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-
-    pdf.drawString(50, 800, "RRR Shopkart - Invoice")
-    pdf.drawString(50, 770, f"Order ID: {order.id}")
-    pdf.drawString(50, 750, f"Customer: {order.user.username}")
-    pdf.drawString(50, 730, f"Email: {order.user.email}")
-    pdf.drawString(50, 710, f"Total Paid: ₹{order.total}")
-
-    pdf.showPage()
-    pdf.save()
-
-    buffer.seek(0)
+    validators = Validators(invoice_digest(order), last_modified=order.paid_at or order.created_at)
+    not_modified = validators.not_modified(request)
+    if not_modified:
+        return not_modified
 
-    return FileResponse(
-        buffer,
+    # Rendered once (normally right after payment), then streamed from the
+    # cache; FileResponse lets the server use sendfile where available.
+    name = ensure_invoice(order)
+    response = FileResponse(
+        get_invoice_storage().open(name, "rb"),
         as_attachment=True,
-        filename=f"invoice_{order.id}.pdf"
+        filename=f"invoice_{order.id}.pdf",
+        content_type="application/pdf",
     )
+    return validators.apply(response, cache_control=INVOICE_CACHE_CONTROL)
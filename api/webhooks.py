@@ -0,0 +1,308 @@
+import datetime
+import logging
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .activity import log_activity
+from .invoices import prerender_invoice
+from .models import CartSnapshot, Order, OrderItem, ProcessedStripeEvent, WebhookEvent
+from .product_cache import invalidate_products
+from .reservations import commit_reservations
+from .sales import order_item_rows, record_daily_sale
+from .snapshots import expire_snapshot
+from .utils import validate_cart
+
+logger = logging.getLogger(__name__)
+
+# Events stuck in "processing" longer than this (seconds) are assumed to
+# belong to a crashed worker and are claimed again.
+WEBHOOK_CLAIM_TIMEOUT = getattr(settings, "WEBHOOK_CLAIM_TIMEOUT", 300)
+WEBHOOK_MAX_ATTEMPTS = getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 5)
+# A failed event waits WEBHOOK_RETRY_DELAY * 2^(attempts - 1) seconds,
+# capped at WEBHOOK_RETRY_MAX_DELAY, before it is claimed again.
+WEBHOOK_RETRY_DELAY = getattr(settings, "WEBHOOK_RETRY_DELAY", 30)
+WEBHOOK_RETRY_MAX_DELAY = getattr(settings, "WEBHOOK_RETRY_MAX_DELAY", 3600)
+
+
+class WebhookRejected(Exception):
+    """
+    The event can never succeed (e.g. its cart snapshot is gone);
+    it is marked failed without retries.
+    """
+
+
+class _AlreadyProcessed(Exception):
+    pass
+
+
+# ==================================================
+# INBOX
+# ==================================================
+
+def _inbox_row(event):
+    return WebhookEvent(event_id=event["id"], event_type=event["type"], payload=event)
+
+
+def enqueue_event(event):
+    """
+    Stores a verified Stripe event. Redeliveries of the same event id are
+    ignored by the unique constraint, so this is a single INSERT.
+    """
+    WebhookEvent.objects.bulk_create([_inbox_row(event)], ignore_conflicts=True)
+
+
+async def aenqueue_event(event):
+    await WebhookEvent.objects.abulk_create([_inbox_row(event)], ignore_conflicts=True)
+
+
+def _claimable():
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=WEBHOOK_CLAIM_TIMEOUT)
+    return WebhookEvent.objects.filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+        status=WebhookEvent.STATUS_PENDING,
+    ) | WebhookEvent.objects.filter(
+        status=WebhookEvent.STATUS_PROCESSING, claimed_at__lt=stale
+    )
+
+
+def claim_events(batch_size, worker_id=None):
+    """
+    Claims up to batch_size events for this worker.
+    PostgreSQL uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers
+    never block each other; SQLite falls back to a conditional claim UPDATE
+    on the claimed_by column.
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    now = timezone.now()
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                _claimable().order_by("received_at")
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:batch_size]
+            )
+            WebhookEvent.objects.filter(id__in=ids).update(
+                status=WebhookEvent.STATUS_PROCESSING, claimed_by=worker_id, claimed_at=now
+            )
+    else:
+        ids = list(_claimable().order_by("received_at").values_list("id", flat=True)[:batch_size])
+        _claimable().filter(id__in=ids).update(
+            status=WebhookEvent.STATUS_PROCESSING, claimed_by=worker_id, claimed_at=now
+        )
+
+    return list(
+        WebhookEvent.objects.filter(claimed_by=worker_id, claimed_at=now, status=WebhookEvent.STATUS_PROCESSING)
+        .order_by("received_at")
+    )
+
+
+def retry_delay(attempts):
+    return min(WEBHOOK_RETRY_DELAY * 2 ** (attempts - 1), WEBHOOK_RETRY_MAX_DELAY)
+
+
+def _run_claimed(inbox_event):
+    try:
+        process_event(inbox_event.payload)
+    except WebhookRejected as e:
+        inbox_event.status = WebhookEvent.STATUS_FAILED
+        inbox_event.last_error = str(e)
+        logger.error({
+            "event": "webhook_rejected",
+            "event_id": inbox_event.event_id,
+            "error": inbox_event.last_error,
+        })
+    except Exception:
+        inbox_event.attempts += 1
+        inbox_event.last_error = traceback.format_exc()
+        if inbox_event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+            inbox_event.status = WebhookEvent.STATUS_FAILED
+            inbox_event.next_attempt_at = None
+            # Needs a human: the event is never retried again
+            logger.critical({
+                "event": "webhook_exhausted",
+                "event_id": inbox_event.event_id,
+                "event_type": inbox_event.event_type,
+                "attempts": inbox_event.attempts,
+                "error": inbox_event.last_error,
+            })
+        else:
+            inbox_event.status = WebhookEvent.STATUS_PENDING
+            inbox_event.next_attempt_at = timezone.now() + datetime.timedelta(
+                seconds=retry_delay(inbox_event.attempts)
+            )
+            logger.error({
+                "event": "webhook_failed",
+                "event_id": inbox_event.event_id,
+                "attempts": inbox_event.attempts,
+                "next_attempt_at": inbox_event.next_attempt_at.isoformat(),
+            })
+    else:
+        inbox_event.status = WebhookEvent.STATUS_DONE
+        inbox_event.processed_at = timezone.now()
+
+    inbox_event.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "processed_at"])
+    return inbox_event.status
+
+
+def _run_claimed_in_thread(inbox_event):
+    try:
+        return _run_claimed(inbox_event)
+    finally:
+        connections.close_all()
+
+
+def process_pending(batch_size=50, concurrency=4, worker_id=None):
+    """
+    Claims one batch and processes it, concurrently when concurrency > 1.
+    Returns the list of resulting statuses.
+    """
+    batch = claim_events(batch_size, worker_id)
+    if not batch:
+        return []
+
+    if concurrency <= 1 or len(batch) == 1:
+        return [_run_claimed(e) for e in batch]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(_run_claimed_in_thread, batch))
+
+
+# ==================================================
+# EVENT HANDLERS
+# ==================================================
+
+def process_event(event):
+    handler = EVENT_HANDLERS.get(event["type"])
+    if handler:
+        handler(event)
+
+
+def handle_checkout_completed(event):
+    session = event["data"]["object"]
+    session_id = session.get("id")
+    user_id = session.get("metadata", {}).get("user_id")
+
+    logger.info(f"Webhook Processing: {event['type']} for session_id={session_id}")
+
+    if not user_id:
+        return
+
+    try:
+        _create_order_from_snapshot(event, session_id, user_id)
+    except _AlreadyProcessed:
+        logger.info(f"Event {event['id']} for session_id={session_id} already processed, skipping.")
+
+
+def _create_order_from_snapshot(event, session_id, user_id):
+    with transaction.atomic():
+        # Idempotency: claim the event/session with a single INSERT
+        try:
+            ProcessedStripeEvent.objects.create(event_id=event["id"], stripe_session_id=session_id)
+        except IntegrityError:
+            raise _AlreadyProcessed()
+
+        # Fetch snapshot
+        snapshot = CartSnapshot.objects.filter(stripe_session_id=session_id).first()
+        if not snapshot:
+            raise WebhookRejected(f"CartSnapshot missing for session_id={session_id}")
+
+        # Current rows, not this worker's catalog snapshot: the order is
+        # already paid. No locks; the conditional UPDATEs guard stock.
+        validated = validate_cart(snapshot.items, fresh=True)
+        valid_items = validated["valid_items"]
+        removed_items = validated["removed_items"]
+
+        if not valid_items:
+            raise WebhookRejected(f"No valid items for session {session_id}")
+
+        # Deduct Stock: commit checkout holds, then conditional UPDATEs
+        # for anything not held (no up-front row locks)
+        requested = {}
+        for v_item in valid_items:
+            pid = v_item["product"].id
+            requested[pid] = requested.get(pid, 0) + v_item["quantity"]
+
+        deducted = commit_reservations(snapshot, requested)
+
+        # Record what Stripe charged (snapshots from before price_inr was
+        # stored fall back to the current price)
+        charged = {
+            int(item["product_id"]): item["price_inr"] for item in snapshot.items if "price_inr" in item
+        }
+
+        total = 0
+        items_snapshot = []
+
+        for v_item in valid_items:
+            product = v_item["product"]
+            qty = min(v_item["quantity"], deducted.get(product.id, 0))
+            price_inr = charged.get(product.id, v_item["price_inr"])
+
+            if qty < v_item["quantity"]:
+                removed_items.append({
+                    "product_id": product.id,
+                    "reason": "quantity_adjusted" if qty else "out_of_stock",
+                    "title": product.title,
+                    "original_qty": v_item["quantity"],
+                    "new_qty": qty
+                })
+            if not qty:
+                continue
+            deducted[product.id] -= qty
+
+            total += price_inr * qty
+            items_snapshot.append({
+                "product_id": product.id,
+                "title": product.title,
+                "price": price_inr,
+                "quantity": qty
+            })
+
+        if removed_items:
+            logger.warning(f"Webhook: items removed/adjusted for session {session_id}: {removed_items}")
+
+        if not items_snapshot:
+            raise WebhookRejected(f"No stock left for session {session_id}")
+
+        transaction.on_commit(lambda: invalidate_products(requested))
+
+        order = Order.objects.create(
+            stripe_session_id=session_id,
+            user_id=user_id,
+            total=total,
+            payment_status="paid",
+            payment_method="stripe",
+            paid_at=timezone.now(),
+            items=items_snapshot
+        )
+        OrderItem.objects.bulk_create(order_item_rows(order))
+        record_daily_sale(order)
+
+        # Commits or rolls back with the order
+        log_activity(user_id, f"Payment Success - Order #{order.id}", sync=True)
+
+        # Render the invoice in this worker once the order is visible
+        transaction.on_commit(lambda: prerender_invoice(order.id))
+
+        # Cleanup Snapshot
+        snapshot.delete()
+        logger.info(f"Order Created Successfully: #{order.id} for session_id={session_id}")
+
+
+def handle_checkout_expired(event):
+    session_id = event["data"]["object"].get("id")
+    expire_snapshot(session_id)
+
+
+EVENT_HANDLERS = {
+    "checkout.session.completed": handle_checkout_completed,
+    "checkout.session.expired": handle_checkout_expired,
+}
@@ -105,6 +105,11 @@ TEMPLATES = [
 ROOT_URLCONF = "backend.urls"
 WSGI_APPLICATION = "backend.wsgi.application"
 
+# Serve checkout, webhook and read-only account views as async views.
+# Enable only under ASGI, e.g.:
+#   gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "0") == "1"
+
 
 # --------------------------------------------------
 # DATABASE CONFIGURATION
@@ -133,6 +138,78 @@ else:
 
 
 
+# --------------------------------------------------
+# CACHE CONFIGURATION
+# --------------------------------------------------
+
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    # ✅ Production (shared across gunicorn workers)
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+else:
+    # ✅ Local Development (per-process memory)
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Read-through product cache (api/product_cache.py). Writers invalidate
+# it from other processes (webhook worker, admin, sync/import), so it is
+# only on when every process shares the cache (Redis).
+PRODUCT_CACHE = os.environ.get("PRODUCT_CACHE", "1" if REDIS_URL else "0") == "1"
+
+# Product cache lifetimes (seconds)
+PRODUCT_CACHE_TTL = int(os.environ.get("PRODUCT_CACHE_TTL", 300))
+MISSING_PRODUCT_TTL = int(os.environ.get("MISSING_PRODUCT_TTL", 60))
+
+# Per-worker catalog snapshot (api/catalog.py). Workers learn about product
+# writes from a counter in the cache, so it is only on when every process
+# shares that cache (Redis); otherwise lookups use get_products.
+CATALOG_SNAPSHOT = os.environ.get("CATALOG_SNAPSHOT", "1" if REDIS_URL else "0") == "1"
+# Backstop: snapshots are rebuilt at least this often (seconds)
+CATALOG_MAX_AGE = int(os.environ.get("CATALOG_MAX_AGE", 300))
+
+# Rows validated and upserted per transaction by the CSV inventory import
+INVENTORY_IMPORT_BATCH_SIZE = int(os.environ.get("INVENTORY_IMPORT_BATCH_SIZE", 2000))
+
+
+# --------------------------------------------------
+# CHECKOUT HOUSEKEEPING
+# --------------------------------------------------
+
+# Stock holds live as long as the Stripe session (min 30 minutes)
+RESERVATION_TTL = int(os.environ.get("RESERVATION_TTL", 1800))
+
+# Abandoned cart snapshots are purged after this many seconds
+CART_SNAPSHOT_TTL = int(os.environ.get("CART_SNAPSHOT_TTL", 3 * 24 * 3600))
+
+# Admin analytics windows in days (DailySales rollup)
+ANALYTICS_WINDOWS = [7, 30, 90, 365]
+
+
+# --------------------------------------------------
+# ACTIVITY LOG WRITER (api/activity.py)
+# --------------------------------------------------
+
+# Entries are queued and bulk-inserted off the request path
+ACTIVITY_LOG_BUFFERED = os.environ.get("ACTIVITY_LOG_BUFFERED", "1") == "1"
+ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get("ACTIVITY_LOG_BATCH_SIZE", 200))
+ACTIVITY_LOG_FLUSH_INTERVAL = float(os.environ.get("ACTIVITY_LOG_FLUSH_INTERVAL", 2))
+ACTIVITY_LOG_MAX_QUEUE = int(os.environ.get("ACTIVITY_LOG_MAX_QUEUE", 10000))
+
+# Entries older than this move to gzipped JSONL files (archive_activity_logs)
+ACTIVITY_LOG_RETENTION_DAYS = int(os.environ.get("ACTIVITY_LOG_RETENTION_DAYS", 90))
+ACTIVITY_ARCHIVE_DIR = os.environ.get("ACTIVITY_ARCHIVE_DIR", str(BASE_DIR / "activity_archive"))
+
+
 # --------------------------------------------------
 # PASSWORD VALIDATION
 # --------------------------------------------------
@@ -178,12 +255,43 @@ STATICFILES_STORAGE = (
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# --------------------------------------------------
+# PRODUCT SYNC (api/product_sync.py)
+# --------------------------------------------------
+
+PRODUCT_SYNC_URL = os.environ.get("PRODUCT_SYNC_URL", "https://dummyjson.com/products")
+PRODUCT_SYNC_PAGE_SIZE = int(os.environ.get("PRODUCT_SYNC_PAGE_SIZE", 50))
+PRODUCT_SYNC_WORKERS = int(os.environ.get("PRODUCT_SYNC_WORKERS", 8))
+PRODUCT_SYNC_CONNECT_TIMEOUT = float(os.environ.get("PRODUCT_SYNC_CONNECT_TIMEOUT", 3))
+PRODUCT_SYNC_READ_TIMEOUT = float(os.environ.get("PRODUCT_SYNC_READ_TIMEOUT", 10))
+PRODUCT_SYNC_CHUNK_SIZE = int(os.environ.get("PRODUCT_SYNC_CHUNK_SIZE", 500))
+
+
+# --------------------------------------------------
+# INVOICE CACHE
+# --------------------------------------------------
+
+# Rendered invoice PDFs (api/invoices.py); any Django storage backend works
+INVOICE_STORAGE = os.environ.get(
+    "INVOICE_STORAGE", "django.core.files.storage.FileSystemStorage"
+)
+INVOICE_STORAGE_OPTIONS = {
+    "location": os.environ.get("INVOICE_CACHE_DIR", str(BASE_DIR / "invoice_cache")),
+}
+
+# Render processes for bulk invoice exports (0 renders in-process)
+INVOICE_EXPORT_WORKERS = int(os.environ.get("INVOICE_EXPORT_WORKERS", 4))
+
+
 # --------------------------------------------------
 # CORS / CSRF SETTINGS
 # --------------------------------------------------
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Let the frontend read pagination cursors
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor"]
+
 CSRF_TRUSTED_ORIGINS = [
     "https://aikart-shop.onrender.com",
     "https://rrr-shopkart-backend.onrender.com",
@@ -198,6 +306,15 @@ CSRF_TRUSTED_ORIGINS = [
 STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY")
 STRIPE_PUBLISHABLE_KEY = os.environ.get("STRIPE_PUBLISHABLE_KEY")
 
+# Outbound client (api/stripe_client.py)
+STRIPE_API_BASE = os.environ.get("STRIPE_API_BASE")  # e.g. a local stub server
+STRIPE_CONNECT_TIMEOUT = float(os.environ.get("STRIPE_CONNECT_TIMEOUT", 3))
+STRIPE_READ_TIMEOUT = float(os.environ.get("STRIPE_READ_TIMEOUT", 10))
+STRIPE_POOL_SIZE = int(os.environ.get("STRIPE_POOL_SIZE", 20))
+STRIPE_BREAKER_FAILURES = int(os.environ.get("STRIPE_BREAKER_FAILURES", 5))
+STRIPE_BREAKER_RESET = float(os.environ.get("STRIPE_BREAKER_RESET", 30))
+STRIPE_SLOW_CALL_SECONDS = float(os.environ.get("STRIPE_SLOW_CALL_SECONDS", 5))
+
 
 # --------------------------------------------------
 # REST FRAMEWORK / JWT SETTINGS
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+from api.catalog import CatalogSnapshot
+from api.models import Product
+
+PRODUCTS = int(os.environ.get("BENCH_PRODUCTS", 100_000))
+CATEGORIES = ["beauty", "fragrances", "furniture", "groceries", "laptops", "smartphones"]
+
+
+def synthetic_rows(count):
+    for i in range(1, count + 1):
+        yield (i, f"Product number {i}", 100 + i % 5000, i % 50, i % 17 != 0, CATEGORIES[i % len(CATEGORIES)])
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, elapsed
+
+
+def bench():
+    snapshot, snap_bytes, snap_secs = measure(
+        lambda: CatalogSnapshot.from_rows(synthetic_rows(PRODUCTS))
+    )
+    instances, orm_bytes, orm_secs = measure(
+        lambda: {
+            row[0]: Product(id=row[0], title=row[1], price_inr=row[2], stock=row[3], is_active=row[4], category=row[5])
+            for row in synthetic_rows(PRODUCTS)
+        }
+    )
+
+    ids = list(range(1, PRODUCTS + 1, 7))
+    start = time.perf_counter()
+    for pid in ids:
+        snapshot.get(pid)
+    lookup_ns = (time.perf_counter() - start) / len(ids) * 1e9
+
+    scale = 100_000 / PRODUCTS
+    print(f"Products:                {PRODUCTS}")
+    print(f"Snapshot memory:         {snap_bytes * scale / 1024 / 1024:.2f} MiB per 100k (built in {snap_secs:.2f}s)")
+    print(f"ORM instance dict:       {orm_bytes * scale / 1024 / 1024:.2f} MiB per 100k (built in {orm_secs:.2f}s)")
+    print(f"Snapshot lookup:         {lookup_ns:.0f} ns/lookup")
+    del instances
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+from django.db import connection
+
+from api.inventory_import import INVENTORY_IMPORT_BATCH_SIZE, import_inventory
+from api.models import Product
+
+ROWS = int(os.environ.get("BENCH_ROWS", 100_000))
+BATCH_SIZE = int(os.environ.get("BENCH_BATCH_SIZE", INVENTORY_IMPORT_BATCH_SIZE))
+CATEGORIES = ["beauty", "fragrances", "furniture", "groceries", "laptops", "smartphones"]
+
+
+def write_csv(path, count, price_shift=0):
+    with open(path, "w", newline="") as f:
+        f.write("id,title,price_inr,category,stock,is_active\n")
+        for i in range(1, count + 1):
+            f.write(
+                f"{i},Product number {i},{100 + (i + price_shift) % 5000},"
+                f"{CATEGORIES[i % len(CATEGORIES)]},{i % 50},{'false' if i % 17 == 0 else 'true'}\n"
+            )
+
+
+def run(label, path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        result = import_inventory(f, batch_size=BATCH_SIZE)
+    print(f"{label:<24} {result['rows']} rows in {result['seconds']:.2f}s "
+          f"({result['rows_per_second']} rows/s, {result['rejected']} rejected)")
+
+
+def bench():
+    # Throwaway test database, so the benchmark never touches real data
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.csv")
+            write_csv(path, ROWS)
+            print(f"Rows:                    {ROWS} (batch size {BATCH_SIZE}, {connection.vendor})")
+            run("Insert (empty table):", path)
+            write_csv(path, ROWS, price_shift=7)
+            run("Upsert (all existing):", path)
+            assert Product.objects.count() == ROWS
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,81 @@
+import datetime
+import io
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from api.invoice_template import render_invoice_pdf, static_layout
+
+RUNS = int(os.environ.get("BENCH_RUNS", 200))
+
+
+def legacy_invoice(order):
+    # The previous order_invoice body: header only, no line items
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+
+    pdf.drawString(50, 800, "RRR Shopkart - Invoice")
+    pdf.drawString(50, 770, f"Order ID: {order.id}")
+    pdf.drawString(50, 750, f"Customer: {order.user.username}")
+    pdf.drawString(50, 730, f"Email: {order.user.email}")
+    pdf.drawString(50, 710, f"Total Paid: ₹{order.total}")
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def synthetic_order(item_count):
+    items = [
+        {"product_id": i, "title": f"Product number {i} with a reasonably long title", "price": 100 + i, "quantity": 1 + i % 3}
+        for i in range(item_count)
+    ]
+    return SimpleNamespace(
+        id=1234,
+        user=SimpleNamespace(username="buyer", email="buyer@example.com"),
+        total=sum(i["price"] * i["quantity"] for i in items),
+        paid_at=datetime.datetime(2024, 1, 1),
+        created_at=datetime.datetime(2024, 1, 1),
+        items=items,
+    )
+
+
+def measure(render, order):
+    render(order)  # warm-up (fonts, cached layout)
+
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        size = len(render(order))
+    elapsed = time.perf_counter() - start
+
+    # Separate pass: tracemalloc slows allocation-heavy code down a lot
+    tracemalloc.start()
+    render(order)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / RUNS * 1000, peak / 1024, size
+
+
+def bench():
+    static_layout()
+    print(f"{'renderer':<22}{'items':>7}{'ms/invoice':>12}{'peak KiB':>10}{'bytes':>9}")
+    for items in (3, 50, 500):
+        order = synthetic_order(items)
+        for label, render in (("legacy (no items)", legacy_invoice), ("template", render_invoice_pdf)):
+            ms, peak, size = measure(render, order)
+            print(f"{label:<22}{items:>7}{ms:>12.2f}{peak:>10.0f}{size:>9}")
+
+
+if __name__ == "__main__":
+    bench()